@@ -1,19 +1,55 @@
 import asyncio
+import re
+import sys
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, TYPE_CHECKING
+from typing import Optional, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from tuide.core.config_manager import ConfigManager # type: ignore
     from tuide.ui.terminal_widget import TerminalWidget # type: ignore
 
+# Placeholder tokens, shared by the substitution mapping and the CWD heuristic
+_PH_WORKSPACE_ROOT = sys.intern("%workspace_root%")
+_PH_CURRENT_FILE_PATH = sys.intern("%current_file_path%")
+_PH_CURRENT_FILE_NAME = sys.intern("%current_file_name%")
+_PH_CURRENT_DIR = sys.intern("%current_dir%")
+_PH_CONFIG_PREFIX = sys.intern("%config:")
+
+_CONFIG_PLACEHOLDER_RE = re.compile(r"%config:([^%]+)%")
+_PLACEHOLDER_RE = re.compile("|".join(
+    re.escape(token)
+    for token in (_PH_WORKSPACE_ROOT, _PH_CURRENT_FILE_PATH, _PH_CURRENT_FILE_NAME, _PH_CURRENT_DIR)
+))
+
 class CommandRunner:
+    __slots__ = ("config_manager", "_terminal_widget", "_has_rich_log", "_cwd_str", "_resolve_cache")
+    RESOLVE_CACHE_SIZE = 256  # Max number of memoized resolve_command_string results
+
     def __init__(
         self,
         config_manager: 'ConfigManager',
         terminal_widget: Optional['TerminalWidget'] = None,
     ):
         self.config_manager = config_manager
+        self._terminal_widget: Optional['TerminalWidget'] = None
+        self._has_rich_log = False
         self.terminal_widget = terminal_widget
+        self._cwd_str: Optional[str] = None # Lazily cached str(Path.cwd()), only needed without a workspace root
+        # LRU of resolved commands keyed by (template, current_file_path, workspace_root).
+        # Cleared whenever the config (or its workspace root) changes.
+        self._resolve_cache: "OrderedDict[Tuple[str, Optional[str], Optional[str]], str]" = OrderedDict()
+        self.config_manager.register_reload_listener(self._resolve_cache.clear)
+
+    @property
+    def terminal_widget(self) -> Optional['TerminalWidget']:
+        return self._terminal_widget
+
+    @terminal_widget.setter
+    def terminal_widget(self, widget: Optional['TerminalWidget']) -> None:
+        self._terminal_widget = widget
+        # Capability is fixed for a widget's lifetime, so check it once here
+        self._has_rich_log = widget is not None and hasattr(widget, 'rich_log')
 
     def resolve_command_string(
         self,
@@ -22,64 +58,97 @@ class CommandRunner:
         workspace_root: Optional[Path] = None,
     ) -> str:
         resolved_command = str(command_template) # Ensure it's a string
-
-        # First, resolve any %config:key% placeholders from ConfigManager
-        # This is done before other placeholders to allow config values to contain other placeholders
-        # Example: "my_command": "echo %workspace_root%/output"
-        # We use the get method which itself can resolve nested %config:...% references
-        if "%config:" in resolved_command:
-            # This simple replacement assumes %config:...% doesn't contain other %config:...%
-            # that would be circularly dependent in a way not handled by ConfigManager.get's own check.
-            # A more robust parser might be needed for complex cases, but ConfigManager.get already does one layer.
-            # We are essentially letting ConfigManager handle its own placeholder type.
-            # The `get` method itself calls `_resolve_value`, which handles %config:...%
-            # So, we just need to call get on the string if it looks like a config placeholder.
-            # This logic might be too simple if the entire string IS a placeholder vs containing one.
-            # Let's assume for now command_template can be directly a key like "%config:mycommand%"
-            # OR a string containing them like "my_script --path %config:default_path%"
-
-            # If the entire string is a %config:...% placeholder
-            if resolved_command.startswith("%config:") and resolved_command.endswith("%"):
-                config_key = resolved_command[len("%config:"):-1]
-                # The ConfigManager.get method will handle resolving this, including internal %config:...%
-                resolved_command = str(self.config_manager.get(config_key, default_value=resolved_command))
-            else:
-                # If it contains %config:...% then ConfigManager's get method should be used by _resolve_value
-                # This means we should pass the command string through a general resolve method
-                # similar to what ConfigManager does for its values.
-                # For now, let's assume ConfigManager.get is sufficient for direct config lookups
-                # and other placeholders are handled next.
-                # A more advanced approach would be to use ConfigManager's _resolve_value here.
-                # For simplicity now, we only handle the case where the *entire* command_template is a %config lookup
-                # or placeholders are resolved in the next block.
-                # This can be enhanced by making resolve_command_string in ConfigManager more generic
-                # and callable from here.
-                pass
-
-
-        effective_ws_root = workspace_root or self.config_manager.workspace_root or Path.cwd()
-
-        # Iterative replacement for up to N levels of nesting (e.g., %config:val% which resolves to "%workspace_root%/foo")
-        # Max 3 passes to prevent infinite loops with badly formed placeholders, and allow simple nesting.
-        for _ in range(3):
+        if "%" not in resolved_command: # No placeholders, nothing to substitute
+            return resolved_command.strip()
+
+        has_file_context = bool(current_file_path) and isinstance(current_file_path, Path)
+        cache_key = (
+            resolved_command,
+            str(current_file_path) if has_file_context else None,
+            str(workspace_root) if workspace_root else None,
+        )
+        cached_command = self._resolve_cache.get(cache_key)
+        if cached_command is not None:
+            self._resolve_cache.move_to_end(cache_key)
+            return cached_command
+
+        if workspace_root:
+            effective_ws_root_str = str(workspace_root)
+        else:
+            effective_ws_root_str = self.config_manager.workspace_root_str or self._get_cwd_str()
+
+        if has_file_context:
+            substitutions = {
+                _PH_WORKSPACE_ROOT: effective_ws_root_str,
+                _PH_CURRENT_FILE_PATH: str(current_file_path),
+                _PH_CURRENT_FILE_NAME: current_file_path.name,
+                _PH_CURRENT_DIR: str(current_file_path.parent),
+            }
+        else:
+            # If no file context, replace with empty strings
+            substitutions = {
+                _PH_WORKSPACE_ROOT: effective_ws_root_str,
+                _PH_CURRENT_FILE_PATH: "",
+                _PH_CURRENT_FILE_NAME: "",
+                _PH_CURRENT_DIR: "",
+            }
+
+        def _sub_config(match: "re.Match[str]") -> str:
+            # ConfigManager.get resolves its own nested %config:...% references
+            return str(self.config_manager.get(match.group(1), default_value=match.group(0)))
+
+        def _sub_placeholder(match: "re.Match[str]") -> str:
+            return substitutions[match.group(0)]
+
+        # Config values may themselves contain placeholders (e.g. "echo %workspace_root%/output"),
+        # so %config:key% lookups are expanded before the path placeholders. A second pass is only
+        # needed when the first one introduced new %...% tokens.
+        for _ in range(2):
             original_command = resolved_command
-            resolved_command = resolved_command.replace("%workspace_root%", str(effective_ws_root))
+            if _PH_CONFIG_PREFIX in resolved_command:
+                resolved_command = _CONFIG_PLACEHOLDER_RE.sub(_sub_config, resolved_command)
+            resolved_command = _PLACEHOLDER_RE.sub(_sub_placeholder, resolved_command)
 
-            if current_file_path and isinstance(current_file_path, Path):
-                resolved_command = resolved_command.replace("%current_file_path%", str(current_file_path))
-                resolved_command = resolved_command.replace("%current_file_name%", current_file_path.name)
-                resolved_command = resolved_command.replace("%current_dir%", str(current_file_path.parent))
-            else:
-                # If no file context, replace with empty strings or a specific marker if needed
-                resolved_command = resolved_command.replace("%current_file_path%", "")
-                resolved_command = resolved_command.replace("%current_file_name%", "")
-                resolved_command = resolved_command.replace("%current_dir%", "")
-
-            # If no changes in this pass, substitutions are complete
-            if resolved_command == original_command:
+            if resolved_command == original_command or "%" not in resolved_command:
                 break
 
-        return resolved_command.strip() # Strip whitespace from the final command
+        resolved_command = resolved_command.strip() # Strip whitespace from the final command
+        self._resolve_cache[cache_key] = resolved_command
+        if len(self._resolve_cache) > self.RESOLVE_CACHE_SIZE:
+            self._resolve_cache.popitem(last=False)
+        return resolved_command
+
+    def _get_cwd_str(self) -> str:
+        if self._cwd_str is None:
+            self._cwd_str = str(Path.cwd())
+        return self._cwd_str
+
+    def _choose_exec_cwd(
+        self,
+        command_template: str,
+        current_file_path: Optional[Path],
+        ws_root_for_res: Optional[Path],
+        execution_cwd_override: Optional[Path] = None,
+    ) -> Path:
+        """
+        Picks the working directory for a command.
+
+        If the command explicitly uses %workspace_root%, or doesn't use %current_dir%,
+        the workspace root is preferred over the current file's directory; otherwise
+        the file's directory is preferred. This is a heuristic. Path.cwd() is only
+        consulted when neither is available.
+        """
+        if execution_cwd_override:
+            return execution_cwd_override
+
+        file_dir = current_file_path.parent if current_file_path and isinstance(current_file_path, Path) else None
+
+        # Placeholders are lowercase literal tokens, so a case-sensitive check is enough.
+        if _PH_WORKSPACE_ROOT in command_template or _PH_CURRENT_DIR not in command_template:
+            preferred, fallback = ws_root_for_res, file_dir
+        else:
+            preferred, fallback = file_dir, ws_root_for_res
+        return preferred or fallback or Path.cwd()
 
     async def execute_command(
         self,
@@ -102,32 +171,17 @@ class CommandRunner:
         )
 
         if not resolved_command: # Check if empty after stripping in resolve_command_string
-            if hasattr(self.terminal_widget, 'rich_log'): # Check if rich_log exists
+            if self._has_rich_log:
                 self.terminal_widget.rich_log.write("[yellow]Warning: CommandRunner: resolved command is empty.[/yellow]")
             else:
                  # Fallback if terminal_widget exists but not rich_log (e.g. if it's a different widget type)
                  print("Warning: CommandRunner: resolved command is empty.")
             return
 
-        # Determine execution CWD
-        exec_cwd: Optional[Path] = None
-        if execution_cwd_override:
-            exec_cwd = execution_cwd_override
-        elif "%workspace_root%" in command_template.lower() or "%current_dir%" not in command_template.lower():
-            # If command seems to explicitly use workspace_root, or doesn't use current_dir,
-            # prefer workspace_root as CWD. This is a heuristic.
-            if ws_root_for_res:
-                exec_cwd = ws_root_for_res
-            elif current_file_path and isinstance(current_file_path, Path): # Fallback to file's dir
-                exec_cwd = current_file_path.parent
-            else: # Ultimate fallback
-                exec_cwd = self.config_manager.workspace_root or Path.cwd()
-        elif current_file_path and isinstance(current_file_path, Path):
-            # If current_dir is likely used or no explicit workspace_root, prefer file's directory
-            exec_cwd = current_file_path.parent
-        elif ws_root_for_res: # Fallback if no file path
-             exec_cwd = ws_root_for_res
-        else: # Ultimate fallback
-            exec_cwd = self.config_manager.workspace_root or Path.cwd()
-
+        exec_cwd = self._choose_exec_cwd(
+            command_template,
+            current_file_path,
+            ws_root_for_res,
+            execution_cwd_override
+        )
         await self.terminal_widget.run_command(resolved_command, cwd=exec_cwd)
@@ -1,9 +1,70 @@
 import json
 import os
+import re
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+try:
+    import orjson # Optional, faster C-level JSON parser
+except ImportError:
+    orjson = None # type: ignore
+
+_CONFIG_PLACEHOLDER_RE = re.compile(r"%config:([^%]+)%")
+_MISSING = object() # Sentinel for flat-dict lookups, since None is a valid config value
+
+def _frozen_copy(value: Any, convert_string: Callable[[str], str]) -> Any:
+    """
+    Read-only copy of a config value: dicts become MappingProxyType views of new dicts, lists
+    become tuples and string leaves are passed through convert_string. The result can be cached
+    and handed to every caller of get() without copying it again.
+    """
+    if isinstance(value, str):
+        return convert_string(value)
+    if not isinstance(value, (dict, list)):
+        return value
+
+    holder: List[Any] = [None]
+    # Lists are filled in place and turned into tuples at the end, innermost first
+    lists: List[Tuple[Any, Any, List[Any]]] = []
+    stack: List[Tuple[Any, Any, Any]] = [(value, holder, 0)] # (source, parent container, key in parent)
+    while stack:
+        source, parent, parent_key = stack.pop()
+        target: Any
+        if isinstance(source, dict):
+            target = {}
+            parent[parent_key] = MappingProxyType(target) # The view sees items added below
+            items = source.items()
+        else:
+            target = [None] * len(source)
+            parent[parent_key] = target
+            lists.append((parent, parent_key, target))
+            items = enumerate(source)
+        for key, child in items:
+            if isinstance(child, (dict, list)):
+                target[key] = None # Keeps the key order; filled in when child is popped
+                stack.append((child, target, key))
+            else:
+                target[key] = convert_string(child) if isinstance(child, str) else child
+    for parent, parent_key, target in reversed(lists):
+        parent[parent_key] = tuple(target)
+    return holder[0]
 
 class ConfigManager:
+    __slots__ = (
+        "project_config_path",
+        "user_config_path",
+        "system_config_path",
+        "_workspace_root",
+        "_workspace_root_str",
+        "config",
+        "_get_cache",
+        "_flat",
+        "_resolving",
+        "_cycle_cut",
+        "_reload_listeners",
+    )
+
     def __init__(
         self,
         project_config_path: Optional[Path] = None,
@@ -14,17 +75,45 @@ class ConfigManager:
         self.project_config_path = project_config_path
         self.user_config_path = user_config_path
         self.system_config_path = system_config_path
-        self.workspace_root = workspace_root or Path.cwd() # Default to CWD
+        self._workspace_root: Optional[Path] = workspace_root or Path.cwd() # Default to CWD
+        self._workspace_root_str: str = str(self._workspace_root)
 
         self.config: Dict[str, Any] = {}
+        # Resolved values returned by get(), keyed by (key_path, workspace_root). Cleared on reload.
+        self._get_cache: Dict[Tuple[str, str], Any] = {}
+        # Dotted key -> resolved leaf value, rebuilt whenever the merged config changes.
+        self._flat: Dict[str, Any] = {}
+        # Keys whose %config:...% references are currently being expanded (cycle guard).
+        self._resolving: Set[str] = set()
+        # Set when the cycle guard left a reference unexpanded during the current get()
+        self._cycle_cut = False
+        # Callbacks notified whenever the resolved config may have changed (see invalidate_cache)
+        self._reload_listeners: List[Callable[[], None]] = []
         self.load_config()
 
+    @property
+    def workspace_root(self) -> Optional[Path]:
+        return self._workspace_root
+
+    @workspace_root.setter
+    def workspace_root(self, path: Optional[Path]) -> None:
+        self._workspace_root = path
+        self._workspace_root_str = str(path) if path else ""
+        self.invalidate_cache() # Resolved values embed the old %workspace_root%
+
+    @property
+    def workspace_root_str(self) -> str:
+        """String form of workspace_root, kept in sync by its setter. Empty if no workspace root is set."""
+        return self._workspace_root_str
+
     def _load_single_config(self, path: Path) -> Dict[str, Any]:
         if path and path.exists() and path.is_file():
             try:
-                with open(path, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
+                data = path.read_bytes()
+                if orjson is not None:
+                    return orjson.loads(data)
+                return json.loads(data)
+            except json.JSONDecodeError: # orjson.JSONDecodeError is a subclass
                 print(f"Warning: Could not decode JSON from {path}") # Replace with logging later
             except Exception as e:
                 print(f"Warning: Could not load config file {path}: {e}") # Replace with logging
@@ -48,71 +137,124 @@ class ConfigManager:
             project_cfg = self._load_single_config(self.project_config_path)
             self._deep_update(self.config, project_cfg)
 
+        self.invalidate_cache()
+
+    def invalidate_cache(self) -> None:
+        """
+        Drops all memoized get() results and rebuilds the flat lookup table.
+        Call after mutating config directly.
+        """
+        self._get_cache.clear()
+        self._flat = {} # Lookups made while rebuilding fall back to the tree walk
+        self._flat = self._flatten_config()
+        for listener in self._reload_listeners:
+            listener()
+
+    def register_reload_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Registers a callback invoked after the config is reloaded or workspace_root changes,
+        so that callers holding values derived from the config can drop them.
+        """
+        self._reload_listeners.append(listener)
+
+    def _flatten_config(self) -> Dict[str, Any]:
+        """
+        Walks the merged config once and maps every dotted key path to its resolved leaf value.
+        Keys that themselves contain '.' (e.g. file_associations) are only reachable via the tree walk.
+        """
+        flat: Dict[str, Any] = {}
+        stack: List[Tuple[str, Dict[str, Any]]] = [("", self.config)]
+        while stack:
+            prefix, level = stack.pop()
+            for key, value in level.items():
+                if "." in key:
+                    continue
+                dotted_key = prefix + key
+                if isinstance(value, dict):
+                    stack.append((dotted_key + ".", value))
+                else:
+                    flat[dotted_key] = self.get(dotted_key)
+        return flat
+
     def _deep_update(self, target: Dict, source: Dict) -> None:
-        for key, value in source.items():
-            if isinstance(value, dict) and key in target and isinstance(target[key], dict):
-                self._deep_update(target[key], value)
-            else:
-                target[key] = value
+        # Explicit worklist of (target, source) dict pairs instead of recursing per nesting level
+        stack = [(target, source)]
+        while stack:
+            current_target, current_source = stack.pop()
+            for key, value in current_source.items():
+                target_value = current_target.get(key)
+                if isinstance(value, dict) and isinstance(target_value, dict):
+                    stack.append((target_value, value))
+                else:
+                    current_target[key] = value
 
     def _resolve_value(self, value: Any, processing_key: Optional[str] = None) -> Any:
-        if isinstance(value, str):
-            # Resolve %config:path.to.value%
-            # This needs to be careful about circular references
-            # A simple way to start, might need more robustness
-            parts = value.split('%config:')
-            if len(parts) > 1:
-                resolved_parts = [parts[0]]
-                for part in parts[1:]:
-                    end_index = part.find('%')
-                    if end_index != -1:
-                        config_key = part[:end_index]
-                        rest_of_string = part[end_index+1:]
-                        # Avoid resolving the same key again if it caused this resolution
-                        if config_key != processing_key:
-                             resolved_config_val = self.get(config_key, default_value=f"%config:{config_key}%")
-                             resolved_parts.append(str(resolved_config_val) + rest_of_string)
-                        else:
-                            # Circular reference detected or attempted re-resolution
-                            resolved_parts.append(f"%config:{config_key}%" + rest_of_string)
-                    else:
-                        resolved_parts.append(part) # Should not happen if format is correct
-                value = "".join(resolved_parts)
-
-            # Resolve %workspace_root%
-            if self.workspace_root:
-                 value = value.replace("%workspace_root%", str(self.workspace_root))
-
-            # Add other substitutions like %current_file_path% later
-            # For now, these will remain as literal strings if not handled above
-            value = value.replace("%current_file_path%", "%current_file_path%") # Placeholder
-            value = value.replace("%current_file_name%", "%current_file_name%") # Placeholder
-            value = value.replace("%current_dir%", "%current_dir%") # Placeholder
-
-
-        elif isinstance(value, dict):
-            return {k: self._resolve_value(v, processing_key) for k, v in value.items()}
-        elif isinstance(value, list):
-            return [self._resolve_value(item, processing_key) for item in value]
+        """Resolves the placeholders in value, returning containers as read-only views (see _frozen_copy)."""
+        return _frozen_copy(value, lambda string: self._resolve_string(string, processing_key))
+
+    def _resolve_string(self, value: str, processing_key: Optional[str] = None) -> str:
+        if "%" not in value: # No placeholders, nothing to resolve
+            return value
+
+        # Resolve %config:path.to.value%
+        if "%config:" in value:
+            def _sub_config(match: "re.Match[str]") -> str:
+                config_key = match.group(1)
+                # Avoid resolving a key that is already being resolved (circular reference)
+                if config_key == processing_key or config_key in self._resolving:
+                    self._cycle_cut = True
+                    return match.group(0)
+                return str(self.get(config_key, default_value=match.group(0)))
+
+            value = _CONFIG_PLACEHOLDER_RE.sub(_sub_config, value)
+
+        # Resolve %workspace_root%
+        if self._workspace_root_str and "%workspace_root%" in value:
+            value = value.replace("%workspace_root%", self._workspace_root_str)
+
+        # %current_file_path%, %current_file_name% and %current_dir% are left as literal
+        # strings here; CommandRunner substitutes them once a file context is known.
         return value
 
     def get(self, key_path: Union[str, List[str]], default_value: Any = None) -> Any:
         keys: List[str]
         if isinstance(key_path, str):
+            original_key_str = key_path
             keys = key_path.split('.')
         else:
             keys = key_path
+            original_key_str = ".".join(keys)
+
+        # Containers are read-only views (MappingProxyType, tuple), so cached values are shared safely
+        flat_value = self._flat.get(original_key_str, _MISSING)
+        if flat_value is not _MISSING:
+            return flat_value
+
+        cache_key = (original_key_str, self._workspace_root_str)
+        if cache_key in self._get_cache:
+            return self._get_cache[cache_key]
 
         current_level = self.config
         for key in keys:
             if isinstance(current_level, dict) and key in current_level:
                 current_level = current_level[key]
             else:
-                return default_value
+                return default_value # Missing keys are not cached; default_value varies per call
 
         # Pass the original key_path for circular reference check during resolution
-        original_key_str = key_path if isinstance(key_path, str) else ".".join(keys)
-        return self._resolve_value(current_level, processing_key=original_key_str)
+        self._resolving.add(original_key_str)
+        outer_cycle_cut, self._cycle_cut = self._cycle_cut, False
+        try:
+            resolved = self._resolve_value(current_level, processing_key=original_key_str)
+        finally:
+            self._resolving.discard(original_key_str)
+            cycle_cut = self._cycle_cut
+            self._cycle_cut = outer_cycle_cut or cycle_cut
+        # A value computed inside another key's resolution, or with a cycle cut short, depends on
+        # which key was asked for first, so only standalone, complete results are memoized.
+        if not self._resolving and not cycle_cut:
+            self._get_cache[cache_key] = resolved
+        return resolved
 
 # Example Usage (for testing, can be removed or put in a test file)
 if __name__ == '__main__':
@@ -1,13 +1,15 @@
 import importlib.util
 import inspect
+import os
 from pathlib import Path
-from typing import Any, Dict, Optional, Callable, TYPE_CHECKING
+from typing import Any, Dict, Optional, Callable, Tuple, Union, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from textual.app import App # Using App as a generic context type for now
     # If a more specific TUIDEApp type hint is available later, it could be used.
 
 class MacroRunner:
+    __slots__ = ("_app_context", "_can_notify", "project_macro_dir", "macros", "_macro_sources")
     MACRO_FUNCTION_NAME = "run_macro"  # Standardized function name within macro files
 
     def __init__(
@@ -23,9 +25,13 @@ class MacroRunner:
                          that will be passed to macros.
             project_macro_dir: The directory to scan for project-specific macros.
         """
-        self.app_context = app_context
+        self.app_context = app_context # Setter also caches whether the context can notify
         self.project_macro_dir = project_macro_dir
-        self.macros: Dict[str, Callable[[Any], Any]] = {}  # Stores discovered macros: name -> function
+        # Stores discovered macros: name -> (function, is_coroutine_function),
+        # or name -> file path until the macro is first run
+        self.macros: Dict[str, Union[Tuple[Callable[[Any], Any], bool], Path]] = {}
+        # Where each macro was discovered: name -> (macro directory, st_mtime of its file then)
+        self._macro_sources: Dict[str, Tuple[Path, float]] = {}
 
         # Discover macros from the project directory if provided
         if self.project_macro_dir and self.project_macro_dir.is_dir():
@@ -33,11 +39,28 @@ class MacroRunner:
 
         # Potentially discover user-level or system-level macros here too in the future
 
+    @property
+    def app_context(self) -> 'App':
+        return self._app_context
+
+    @app_context.setter
+    def app_context(self, app_context: 'App') -> None:
+        self._app_context = app_context
+        self._can_notify = hasattr(app_context, 'notify')
+
     def discover_macros(self, macro_dir: Path) -> None:
         """
         Discovers macros from Python files in the specified directory.
         A file is considered a macro if it's a .py file not starting with '_'
-        and contains a function named self.MACRO_FUNCTION_NAME.
+        and its source defines a function named self.MACRO_FUNCTION_NAME.
+
+        Macro modules are not imported here; only their paths are recorded.
+        The module is executed on the first run_macro call (see _load_macro).
+
+        Discovery is incremental: files whose mtime is unchanged since the last
+        scan keep their existing entry (including an already imported function),
+        and macros previously discovered in macro_dir whose file no longer exists
+        there are dropped. Macros discovered in other directories are left alone.
 
         Args:
             macro_dir: The directory to scan.
@@ -47,42 +70,88 @@ class MacroRunner:
             # print(f"Warning: Macro directory '{macro_dir}' not found.")
             return
 
-        for file_path in macro_dir.glob("*.py"):
-            if file_path.name.startswith("_"):  # Skip private-like files (e.g., __init__.py)
-                continue
+        found_names = set()
+        # A single scandir pass; DirEntry caches the file type and stat result
+        with os.scandir(macro_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                # Skip non-Python and private-like files (e.g., __init__.py)
+                if not name.endswith(".py") or name.startswith("_") or not entry.is_file():
+                    continue
+
+                macro_name = name[:-3]  # Use the filename (without .py) as the macro name
+                file_path = Path(entry.path)
+                found_names.add(macro_name)
+                try:
+                    mtime = entry.stat().st_mtime
+                    if self._macro_sources.get(macro_name) == (macro_dir, mtime) and macro_name in self.macros:
+                        continue # Unchanged since last discovery
+                    source = file_path.read_text(encoding='utf-8')
+                except Exception as e:
+                    print(f"Error reading macro '{macro_name}' from {file_path}: {e}") # Placeholder
+                    self._notify(f"Error loading macro '{macro_name}': {e}", severity="warning", timeout=5)
+                    continue
+
+                # Cheap syntactic check (also matches "async def run_macro")
+                if f"def {self.MACRO_FUNCTION_NAME}" in source:
+                    self.macros[macro_name] = file_path # A changed file is re-imported on its next run
+                    self._macro_sources[macro_name] = (macro_dir, mtime)
+                elif self._is_from(macro_name, macro_dir):
+                    # print(f"Warning: No '{self.MACRO_FUNCTION_NAME}' function in {file_path}.")
+                    self._forget(macro_name)
+
+        for macro_name in [n for n in self.macros if n not in found_names and self._is_from(n, macro_dir)]:
+            self._forget(macro_name) # Macro file was deleted
+
+    def _is_from(self, macro_name: str, macro_dir: Path) -> bool:
+        source = self._macro_sources.get(macro_name)
+        return source is not None and source[0] == macro_dir
+
+    def _forget(self, macro_name: str) -> None:
+        self.macros.pop(macro_name, None)
+        self._macro_sources.pop(macro_name, None)
+
+    def _load_macro(self, macro_name: str, file_path: Path) -> Optional[Tuple[Callable[[Any], Any], bool]]:
+        """
+        Imports a discovered macro file and returns its macro function.
+        On success the function replaces the file path in self.macros,
+        together with whether it is a coroutine function (fixed once loaded).
 
-            macro_name = file_path.stem  # Use the filename (without .py) as the macro name
+        Returns:
+            A (macro function, is_coroutine_function) pair, or None if the module failed to load or has no callable macro function.
+        """
+        try:
+            # Create a module spec from the file path
+            spec = importlib.util.spec_from_file_location(macro_name, str(file_path))
+            if not spec or not spec.loader:
+                self._notify(f"Could not load macro '{macro_name}' from {file_path}.", severity="error")
+                return None
+
+            module = importlib.util.module_from_spec(spec)
+            # Execute the module to make its contents available
+            spec.loader.exec_module(module)
+        except Exception as e:
+            # Handle errors during module loading/importing
+            # In a real application, this should use the app's logging system.
+            print(f"Error loading macro '{macro_name}' from {file_path}: {e}") # Placeholder
+            self._notify(f"Error loading macro '{macro_name}': {e}", severity="warning", timeout=5)
+            return None
+
+        macro_function = getattr(module, self.MACRO_FUNCTION_NAME, None)
+        if not callable(macro_function):
+            self._notify(f"Macro '{macro_name}' has no callable '{self.MACRO_FUNCTION_NAME}'.", severity="error")
+            return None
+
+        loaded_macro = (macro_function, inspect.iscoroutinefunction(macro_function))
+        self.macros[macro_name] = loaded_macro
+        return loaded_macro
+
+    def _notify(self, message: str, **kwargs: Any) -> None:
+        if self._can_notify:
             try:
-                # Create a module spec from the file path
-                spec = importlib.util.spec_from_file_location(macro_name, str(file_path))
-
-                if spec and spec.loader:
-                    module = importlib.util.module_from_spec(spec)
-                    # Execute the module to make its contents available
-                    spec.loader.exec_module(module)
-
-                    if hasattr(module, self.MACRO_FUNCTION_NAME):
-                        macro_function = getattr(module, self.MACRO_FUNCTION_NAME)
-                        if callable(macro_function):
-                            self.macros[macro_name] = macro_function
-                            # print(f"Discovered macro: '{macro_name}'") # For debugging
-                        # else:
-                            # print(f"Warning: '{self.MACRO_FUNCTION_NAME}' in {file_path} is not callable.")
-                    # else:
-                        # print(f"Warning: No '{self.MACRO_FUNCTION_NAME}' function in {file_path}.")
-                # else:
-                    # print(f"Warning: Could not create module spec for {file_path}.")
-            except Exception as e:
-                # Handle errors during module loading/importing
-                # In a real application, this should use the app's logging system
-                # and potentially notify the user if a macro fails to load.
-                print(f"Error loading macro '{macro_name}' from {file_path}: {e}") # Placeholder
-                if hasattr(self.app_context, 'notify'):
-                    try:
-                        self.app_context.notify(f"Error loading macro '{macro_name}': {e}", severity="warning", timeout=5) # type: ignore
-                    except Exception: # Guard against issues with notify itself
-                        pass
-
+                self.app_context.notify(message, **kwargs) # type: ignore
+            except Exception: # Guard against issues with notify itself
+                pass
 
     async def run_macro(self, macro_name: str) -> None:
         """
@@ -93,18 +162,20 @@ class MacroRunner:
         """
         if macro_name not in self.macros:
             # print(f"Macro '{macro_name}' not found.")
-            if hasattr(self.app_context, 'notify'):
-                try:
-                    self.app_context.notify(f"Macro '{macro_name}' not found.", severity="error") # type: ignore
-                except Exception:
-                    pass
+            self._notify(f"Macro '{macro_name}' not found.", severity="error")
             return
 
-        macro_function = self.macros[macro_name]
+        macro_entry = self.macros[macro_name]
+        if isinstance(macro_entry, Path):
+            loaded_macro = self._load_macro(macro_name, macro_entry)
+            if loaded_macro is None:
+                return
+            macro_entry = loaded_macro
+        macro_function, is_coroutine_function = macro_entry
 
         # print(f"Running macro: '{macro_name}'") # For debugging
         try:
-            if inspect.iscoroutinefunction(macro_function):
+            if is_coroutine_function:
                 await macro_function(self.app_context)
             else:
                 # Consider running synchronous macros in a thread if they might block
@@ -112,26 +183,22 @@ class MacroRunner:
                 macro_function(self.app_context)
 
             # print(f"Macro '{macro_name}' executed successfully.") # For debugging
-            if hasattr(self.app_context, 'notify'):
-                try:
-                    self.app_context.notify(f"Macro '{macro_name}' executed.", severity="information", timeout=3) # type: ignore
-                except Exception:
-                    pass
+            self._notify(f"Macro '{macro_name}' executed.", severity="information", timeout=3)
         except Exception as e:
             # print(f"Error running macro '{macro_name}': {e}")
-            if hasattr(self.app_context, 'notify'):
-                try:
-                    self.app_context.notify(f"Error in macro '{macro_name}': {str(e) or type(e).__name__}", severity="error") # type: ignore
-                except Exception:
-                    pass
+            self._notify(f"Error in macro '{macro_name}': {str(e) or type(e).__name__}", severity="error")
 
     def reload_macros(self) -> None:
         """
-        Clears existing macros and re-discovers them from the configured directory.
+        Re-discovers macros from the configured directory.
+        Only macro files that were added or modified since the last discovery are re-read.
         """
-        self.macros.clear()
         if self.project_macro_dir and self.project_macro_dir.is_dir():
             self.discover_macros(self.project_macro_dir)
+        elif self.project_macro_dir:
+            # The directory is gone: drop its macros, keep any discovered elsewhere
+            for macro_name in [n for n in self.macros if self._is_from(n, self.project_macro_dir)]:
+                self._forget(macro_name)
         # Notify about reload, if desired
         # if hasattr(self.app_context, 'notify'):
         #     self.app_context.notify("Macros reloaded.", severity="information", timeout=2) # type: ignore
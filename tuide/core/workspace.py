@@ -1,7 +1,61 @@
+import logging
+import os
+import stat
+import sys
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def _realpath(path: Path) -> Path:
+    """
+    Equivalent of Path.resolve() (non-strict) that works on the string form directly
+    through os.path.realpath, skipping Path.resolve()'s extra PurePath construction.
+    """
+    return Path(os.path.realpath(path))
+
+def _stat_regular_file(path: Path) -> Optional[os.stat_result]:
+    """Returns the stat result if path is an existing regular file (following symlinks), else None."""
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+def _read_text_file(path: Path) -> str:
+    """
+    Reads a whole UTF-8 file like Path.read_text(), but with a single read() sized from
+    fstat(), hinting the kernel to prefetch the file first where posix_fadvise is available.
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0)) # O_BINARY only exists on Windows
+    try:
+        size = os.fstat(fd).st_size
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, size, os.POSIX_FADV_WILLNEED)
+        data = os.read(fd, size)
+    finally:
+        os.close(fd)
+    return _decode_text(data)
+
+def _decode_text(data: bytes) -> str:
+    text = data.decode('utf-8')
+    if "\r" in text: # Match read_text()'s universal newline translation
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
 
 class Workspace:
+    __slots__ = (
+        "_project_root", "_open_files", "_open_files_tuple", "_active_file", "_mru",
+        "_resolve_cache", "_dir_resolve_cache", "_fd_cache", "_content_cache", "_content_cache_chars",
+    )
+    RESOLVE_CACHE_SIZE = 256  # Max number of memoized path resolutions
+    BATCH_OPEN_WORKERS = 8  # Max threads used by open_files_batch
+    FD_CACHE_SIZE = 32  # Max number of file descriptors kept open by get_active_file_content
+    CONTENT_CACHE_SIZE = 16  # Max number of file contents memoized by get_active_file_content
+    CONTENT_CACHE_MAX_CHARS = 64 * 1024 * 1024  # Total size budget for memoized contents
+
     def __init__(self, project_root: Optional[Path] = None):
         """
         Initializes the Workspace.
@@ -9,16 +63,119 @@ class Workspace:
         Args:
             project_root: The root directory of the project. Defaults to current working directory.
         """
-        self.project_root: Path = (project_root or Path.cwd()).resolve()
+        self._project_root: Path = (project_root or Path.cwd()).resolve()
 
-        # _open_files stores paths in the order they were opened.
-        # Useful for determining tab order or next file to activate.
-        self._open_files: List[Path] = []
-
-        # _open_files_set provides fast O(1) average time complexity for checking if a file is open.
-        self._open_files_set: Set[Path] = set()
+        # _open_files stores paths in the order they were opened (dicts preserve insertion order).
+        # Useful for determining tab order or next file to activate, and gives O(1) membership
+        # checks and removal. Keys are the interned string form of the resolved path (cheaper
+        # to hash and compare than Path); values are the canonical Path handed out by the API.
+        self._open_files: Dict[str, Path] = {}
+        self._open_files_tuple: Optional[Tuple[Path, ...]] = None # Cached open_files view
 
         self._active_file: Optional[Path] = None
+        # Open files (canonical instances) ordered by most recent activation, front first.
+        # Decides which tab gets focus when the active one is closed.
+        self._mru: Deque[Path] = deque()
+
+        # Bounded LRU of input path -> resolved path, so repeated queries for the same tab
+        # don't walk the filesystem again. Entries for a file are dropped when it is closed.
+        self._resolve_cache: "OrderedDict[Path, Path]" = OrderedDict()
+
+        # Bounded LRU of directory -> resolved directory. Sibling files share their parent's
+        # resolution, so a new file under an already seen directory costs one lstat().
+        self._dir_resolve_cache: "OrderedDict[Path, Path]" = OrderedDict()
+        self._seed_dir_resolve_cache(project_root)
+
+        # Bounded LRU of resolved path -> (fd, st_dev, st_ino), so switching back to a tab
+        # doesn't reopen its file. The device/inode pair detects files replaced on disk.
+        self._fd_cache: "OrderedDict[Path, Tuple[int, int, int]]" = OrderedDict()
+
+        # Bounded LRU of resolved path -> (st_mtime_ns, st_size, content). A hit costs one stat()
+        # instead of a full read and decode. Shared with the editors via get_cached_content.
+        self._content_cache: "OrderedDict[Path, Tuple[int, int, str]]" = OrderedDict()
+        self._content_cache_chars = 0
+
+    @property
+    def project_root(self) -> Path:
+        """The resolved project root. Relative paths are taken relative to it."""
+        return self._project_root
+
+    @project_root.setter
+    def project_root(self, project_root: Path) -> None:
+        self._project_root = project_root.resolve()
+        # Memoized resolutions of relative paths point into the old root
+        self._resolve_cache.clear()
+        self._dir_resolve_cache.clear()
+        self._seed_dir_resolve_cache(project_root)
+
+    def _seed_dir_resolve_cache(self, project_root: Optional[Path]) -> None:
+        self._dir_resolve_cache[self._project_root] = self._project_root
+        if project_root is not None and project_root.is_absolute():
+            self._dir_resolve_cache[project_root] = self._project_root
+
+    def resolve(self, file_path: Path, refresh: bool = False) -> Path:
+        """
+        Returns file_path made absolute (relative to project_root) with symlinks resolved,
+        like Path.resolve(), but memoized so repeated lookups of the same path skip realpath.
+
+        Args:
+            file_path: The path to resolve.
+            refresh: Drop the memoized resolution of the path and its directory first. Pass
+                     True when a previously resolved path turned out not to exist, since a
+                     renamed directory or retargeted symlink leaves the memoized result stale.
+        """
+        if refresh:
+            self._forget_resolution(file_path)
+        return self._resolve(file_path)
+
+    def _forget_resolution(self, file_path: Path) -> None:
+        """Drops the memoized resolutions of file_path and of its parent directory."""
+        if not file_path.is_absolute():
+            file_path = self.project_root / file_path
+        self._resolve_cache.pop(file_path, None)
+        if file_path.parent != self.project_root: # The root itself only changes via the setter
+            self._dir_resolve_cache.pop(file_path.parent, None)
+
+    def _resolve(self, file_path: Path) -> Path:
+        """
+        Returns the resolved form of file_path, memoized. Relative paths are taken relative
+        to the (already resolved) project root rather than the process CWD.
+        """
+        if not file_path.is_absolute():
+            file_path = self.project_root / file_path
+
+        cached = self._resolve_cache.get(file_path)
+        if cached is not None:
+            self._resolve_cache.move_to_end(file_path)
+            return cached
+
+        resolved = self._resolve_via_parent(file_path)
+        self._resolve_cache[file_path] = resolved
+        if len(self._resolve_cache) > self.RESOLVE_CACHE_SIZE:
+            self._resolve_cache.popitem(last=False)
+        return resolved
+
+    def _resolve_via_parent(self, abs_path: Path) -> Path:
+        """
+        Resolves an absolute path by reusing the cached resolution of its parent directory.
+        Only the final component is checked (one lstat); a symlinked file or a path with
+        '..' components falls back to a full realpath walk.
+        """
+        if abs_path == self.project_root: # Already resolved by __init__ or the setter
+            return self.project_root
+        if ".." in abs_path.parts or os.path.islink(abs_path):
+            return _realpath(abs_path)
+
+        parent = abs_path.parent
+        resolved_parent = self._dir_resolve_cache.get(parent)
+        if resolved_parent is None:
+            resolved_parent = _realpath(parent)
+            self._dir_resolve_cache[parent] = resolved_parent
+            if len(self._dir_resolve_cache) > self.RESOLVE_CACHE_SIZE:
+                self._dir_resolve_cache.popitem(last=False)
+        else:
+            self._dir_resolve_cache.move_to_end(parent)
+        return resolved_parent / abs_path.name
 
     @property
     def active_file(self) -> Optional[Path]:
@@ -26,57 +183,118 @@ class Workspace:
         return self._active_file
 
     @property
-    def open_files(self) -> List[Path]:
-        """A list of all currently open files, in the order they were opened. Returns a copy."""
-        return list(self._open_files)
+    def open_files(self) -> Tuple[Path, ...]:
+        """
+        All currently open files, in the order they were opened. Returns an immutable tuple
+        that is cached until the set of open files changes, so repeated reads don't copy.
+        """
+        if self._open_files_tuple is None:
+            self._open_files_tuple = tuple(self._open_files.values())
+        return self._open_files_tuple
 
-    def open_file(self, file_path: Path) -> bool:
+    def open_file(self, file_path: Path, validate: bool = True) -> bool:
         """
         Opens a file, adds it to the list of open files if not already present,
         and sets it as the active file. Ensures the path is absolute and resolves symlinks.
+        A relative file_path is interpreted relative to project_root.
 
         Args:
             file_path: The path to the file to open.
+            validate: Whether to check that the path is an existing file. Callers that have
+                      just verified this themselves (e.g. the UI) can pass False to skip the stat.
 
         Returns:
             True if the file was newly added to the list of open files (i.e., it wasn't open already),
             False otherwise (e.g., file was already open, or file does not exist).
         """
-        abs_path = file_path.resolve() # Resolves to absolute, handles symlinks
+        return self._open_resolved(file_path, self._resolve(file_path), check_exists=validate)
+
+    def _open_resolved(self, file_path: Path, abs_path: Path, *, check_exists: bool = True) -> bool:
+        """
+        open_file for a path the caller has already resolved (abs_path is file_path resolved).
+        file_path is only resolved again if abs_path turns out not to exist.
+        """
+        if not check_exists:
+            return self._open_checked(abs_path, True)
+        is_file = _stat_regular_file(abs_path) is not None
+        if not is_file: # Possibly a stale memoized resolution: resolve afresh and check again
+            abs_path = self.resolve(file_path, refresh=True)
+            is_file = _stat_regular_file(abs_path) is not None
+        return self._open_checked(abs_path, is_file)
+
+    def open_files_batch(self, file_paths: List[Path]) -> List[bool]:
+        """
+        Opens several files at once (e.g. when restoring a session or loading a project).
+        Path resolution and the is_file() checks for all paths run concurrently in a thread
+        pool, so their syscalls overlap instead of running one after another. The results
+        are then applied in input order, exactly as repeated open_file calls would, so the
+        last valid path becomes the active file.
+
+        Args:
+            file_paths: The paths of the files to open.
 
-        if not abs_path.is_file():
-            # In a real application, this would use logging or notify the user through the UI.
-            print(f"Workspace Warning: Cannot open non-existent or non-file path: {abs_path}")
+        Returns:
+            One open_file-style result per input path.
+        """
+        if not file_paths:
+            return []
+
+        def _check(path: Path) -> Tuple[Path, Optional[os.stat_result]]:
+            abs_path = _realpath(path if path.is_absolute() else self.project_root / path)
+            return abs_path, _stat_regular_file(abs_path)
+
+        with ThreadPoolExecutor(max_workers=min(len(file_paths), self.BATCH_OPEN_WORKERS)) as executor:
+            checked_paths = list(executor.map(_check, file_paths))
+        return [self._open_checked(abs_path, st is not None) for abs_path, st in checked_paths]
+
+    def _open_checked(self, abs_path: Path, is_file: bool) -> bool:
+        """Adds an already resolved and stat-checked path to the open files and activates it."""
+        if not is_file:
+            logger.warning("Workspace Warning: Cannot open non-existent or non-file path: %s", abs_path)
             return False
 
         is_newly_opened = False
-        if abs_path not in self._open_files_set:
-            self._open_files.append(abs_path)
-            self._open_files_set.add(abs_path)
+        path_key = os.fspath(abs_path)
+        if path_key not in self._open_files:
+            self._open_files[sys.intern(path_key)] = abs_path
+            self._open_files_tuple = None
             is_newly_opened = True
+        else:
+            abs_path = self._open_files[path_key] # Keep handing out the canonical instance
 
-        self._active_file = abs_path
+        self._activate(abs_path, is_newly_opened)
         # print(f"Workspace: Opened and activated '{abs_path}'. Newly opened: {is_newly_opened}") # Debug
         return is_newly_opened
 
+    def _activate(self, abs_path: Path, is_newly_opened: bool = False) -> None:
+        """Makes an open file's canonical path the active file and moves it to the front of the MRU order."""
+        if is_newly_opened:
+            self._mru.appendleft(abs_path)
+        elif self._mru[0] is not abs_path:
+            self._mru.remove(abs_path) # O(number of open files), which stays small
+            self._mru.appendleft(abs_path)
+        self._active_file = abs_path
+
     def close_file(self, file_path: Path) -> None:
         """
         Closes a file, removing it from the list of open files.
         If the closed file was the active file, it attempts to set a new active file
-        (typically the last one in the list of remaining open files).
+        (the most recently active of the remaining open files).
         """
-        abs_path = file_path.resolve()
-        if abs_path in self._open_files_set:
-            self._open_files.remove(abs_path)
-            self._open_files_set.remove(abs_path)
+        abs_path = self._resolve(file_path)
+        path_key = os.fspath(abs_path)
+        if path_key in self._open_files:
+            # The stored canonical instance; _active_file always refers to one of these
+            abs_path = self._open_files.pop(path_key)
+            self._open_files_tuple = None
+            self._mru.remove(abs_path)
+            self._close_cached_fd(abs_path)
+            # The content stays memoized (validated by mtime/size) so reopening the tab is cheap
+            for stale_key in [key for key, value in self._resolve_cache.items() if value == abs_path]:
+                del self._resolve_cache[stale_key]
             # print(f"Workspace: Closed '{abs_path}'.") # Debug
 
-            if self._active_file == abs_path:
-                self._active_file = self.get_next_file_to_focus()
-                # if self._active_file:
-                #     print(f"Workspace: New active file is '{self._active_file}'.") # Debug
-                # else:
-                #     print("Workspace: No files left open, active file is None.") # Debug
+            self._active_file = self.get_next_file_to_focus() if self._active_file is abs_path else self._active_file
         # else:
             # print(f"Workspace Warning: File not open, cannot close: {abs_path}") # Debug/Log
 
@@ -93,36 +311,36 @@ class Workspace:
             False if it was already open and just switched to active.
             Returns False if the file_path does not point to a valid file.
         """
-        abs_path = file_path.resolve()
-        if not self.is_file_open(abs_path):
-            # open_file handles non-existent files and sets active status
-            return self.open_file(abs_path)
-        else:
-            if abs_path.is_file(): # Ensure it's still a file (though is_file_open implies it was)
-                self._active_file = abs_path
-                # print(f"Workspace: Set active file to '{abs_path}'.") # Debug
-                return False # Not newly opened, just switched
-            else: # Should ideally not happen if is_file_open was true based on a valid file
-                # print(f"Workspace Warning: Cannot set non-file as active: {abs_path}") # Debug/Log
-                return False
-
+        abs_path = self._resolve(file_path)
+        path_key = os.fspath(abs_path)
+        if path_key not in self._open_files:
+            # _open_resolved handles non-existent files (and stale resolutions) and sets active status
+            return self._open_resolved(file_path, abs_path)
+        # Open files were verified when opened; if one has since vanished, the next read reports it
+        self._activate(self._open_files[path_key]) # Canonical instance
+        # print(f"Workspace: Set active file to '{abs_path}'.") # Debug
+        return False # Not newly opened, just switched
 
     def is_file_open(self, file_path: Path) -> bool:
         """Checks if the given file_path is currently in the list of open files."""
-        return file_path.resolve() in self._open_files_set
+        # Fast path: open files are stored resolved, so an absolute input that is
+        # already a key needs no resolution at all.
+        if file_path.is_absolute() and os.fspath(file_path) in self._open_files:
+            return True
+        return os.fspath(self._resolve(file_path)) in self._open_files
 
     def get_next_file_to_focus(self) -> Optional[Path]:
         """
         Determines which file should become active if the current active_file is closed
         or if a "next tab" action is performed.
-        Currently returns the last file in the open_files list (most recently opened or focused).
+        Returns the most recently active open file other than the current active_file,
+        like the tab switching order of most editors.
 
         Returns:
             The path of the next file to focus, or None if no other files are open.
         """
-        if not self._open_files:
-            return None
-        return self._open_files[-1] # Simple strategy: last opened becomes active
+        # The active file, if still open, is at the front, so this looks at most two entries
+        return next((path for path in self._mru if path is not self._active_file), None)
 
     # Placeholder for future functionality
     def get_active_file_content(self) -> Optional[str]:
@@ -131,14 +349,109 @@ class Workspace:
         This would typically involve interacting with an editor component.
         For now, it could just read from disk or return None.
         """
-        if self.active_file and self.active_file.is_file():
-            # This is a direct disk read, in reality, it might come from an editor buffer
-            try:
-                return self.active_file.read_text(encoding='utf-8')
-            except Exception as e:
-                # print(f"Workspace Error: Could not read active file content: {e}") # Debug/Log
-                return None
-        return None
+        if not self.active_file:
+            return None
+        # Always a fresh stat: the file may have changed since it was opened or last read
+        st = _stat_regular_file(self.active_file)
+        if st is None:
+            return None
+
+        cached = self._lookup_content(self.active_file, st)
+        if cached is not None:
+            return cached
+
+        # This is a direct disk read, in reality, it might come from an editor buffer
+        try:
+            content = self._read_with_cached_fd(self.active_file, st)
+        except Exception as e:
+            # print(f"Workspace Error: Could not read active file content: {e}") # Debug/Log
+            return None
+        # Cached under the stat taken before the read: if the file changed in between, the key is
+        # older than the content and the next lookup simply misses
+        self._cache_content(self.active_file, st, content)
+        return content
+
+    def get_cached_content(self, file_path: Path, st: os.stat_result) -> Optional[str]:
+        """
+        Returns the memoized content of file_path if the file still has the mtime and size
+        recorded in st, else None.
+        """
+        return self._lookup_content(self._resolve(file_path), st)
+
+    def cache_content(self, file_path: Path, st: os.stat_result, content: str) -> None:
+        """Memoizes content as the text of file_path at the version described by st."""
+        self._cache_content(self._resolve(file_path), st, content)
+
+    def invalidate_content(self, file_path: Path) -> None:
+        """Forgets the memoized content of file_path, e.g. after it has been written."""
+        self._drop_cached_content(self._resolve(file_path))
+
+    def _lookup_content(self, abs_path: Path, st: os.stat_result) -> Optional[str]:
+        cached = self._content_cache.get(abs_path)
+        if cached is None or cached[0] != st.st_mtime_ns or cached[1] != st.st_size:
+            return None
+        self._content_cache.move_to_end(abs_path)
+        return cached[2]
+
+    def _cache_content(self, abs_path: Path, st: os.stat_result, content: str) -> None:
+        self._drop_cached_content(abs_path)
+        if len(content) > self.CONTENT_CACHE_MAX_CHARS:
+            return
+        self._content_cache[abs_path] = (st.st_mtime_ns, st.st_size, content)
+        self._content_cache_chars += len(content)
+        while (len(self._content_cache) > self.CONTENT_CACHE_SIZE
+               or self._content_cache_chars > self.CONTENT_CACHE_MAX_CHARS):
+            _, (_, _, evicted) = self._content_cache.popitem(last=False)
+            self._content_cache_chars -= len(evicted)
+
+    def _drop_cached_content(self, abs_path: Path) -> None:
+        cached = self._content_cache.pop(abs_path, None)
+        if cached is not None:
+            self._content_cache_chars -= len(cached[2])
+
+    def _read_with_cached_fd(self, abs_path: Path, st: os.stat_result) -> str:
+        """
+        Reads a file via a cached descriptor with pread(), which leaves the descriptor's offset alone.
+        st's size is only a hint for the first read; reading continues to EOF in case the file grew.
+        """
+        if not hasattr(os, "pread"): # e.g. Windows
+            return _read_text_file(abs_path)
+
+        cached = self._fd_cache.get(abs_path)
+        if cached is not None and (cached[1], cached[2]) != (st.st_dev, st.st_ino):
+            # The file was replaced (e.g. by an atomic save) since the descriptor was opened
+            self._close_cached_fd(abs_path)
+            self._drop_cached_content(abs_path)
+            cached = None
+
+        if cached is None:
+            fd = os.open(abs_path, os.O_RDONLY)
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, st.st_size, os.POSIX_FADV_WILLNEED)
+            cached = (fd, st.st_dev, st.st_ino)
+            self._fd_cache[abs_path] = cached
+            if len(self._fd_cache) > self.FD_CACHE_SIZE:
+                _, (evicted_fd, _, _) = self._fd_cache.popitem(last=False)
+                os.close(evicted_fd)
+        else:
+            self._fd_cache.move_to_end(abs_path)
+
+        fd = cached[0]
+        data = os.pread(fd, st.st_size, 0)
+        while more := os.pread(fd, 64 * 1024, len(data)): # The file grew since st was taken
+            data += more
+        return _decode_text(data)
+
+    def _close_cached_fd(self, abs_path: Path) -> None:
+        cached = self._fd_cache.pop(abs_path, None)
+        if cached is not None:
+            os.close(cached[0])
+
+    def close(self) -> None:
+        """Releases the file descriptors cached by get_active_file_content."""
+        while self._fd_cache:
+            _, (fd, _, _) = self._fd_cache.popitem()
+            os.close(fd)
 
 # Example Usage (for testing, can be removed or put in a test file later)
 if __name__ == '__main__':
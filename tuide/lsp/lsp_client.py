@@ -1,9 +1,138 @@
 import asyncio
+import heapq
+import itertools
 import json
+import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Callable, Awaitable
+from typing import Any, Dict, List, Optional, Callable, Awaitable, Tuple
+
+try:
+    import orjson # Optional, much faster encoding of large didOpen/didChange bodies
+except ImportError:
+    orjson = None # type: ignore
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None # type: ignore
+_F_SETPIPE_SZ = getattr(fcntl, "F_SETPIPE_SZ", None) # Linux only
+
+def _json_dumps(message: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(message)
+    return json.dumps(message).encode('utf-8')
+
+def _json_loads(data: bytes) -> Any:
+    # Both parsers accept UTF-8 bytes directly, so no separate decode pass is needed
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# A framed message as (header, body). The two parts are handed to writelines() separately,
+# so a large body is never copied just to prepend its header.
+_Frame = Tuple[bytes, bytes]
+
+def _set_pipe_size(fd: int, size: int) -> None:
+    try:
+        fcntl.fcntl(fd, _F_SETPIPE_SZ, size)
+    except OSError: # e.g. above /proc/sys/fs/pipe-max-size; keep the default size
+        pass
+
+def _frame_message(content: bytes) -> _Frame:
+    return b"Content-Length: %d\r\n\r\n" % len(content), content
+
+# Pre-serialized bodies of the messages sent on every keystroke or cursor move. Only the
+# variable leaves are encoded per call (strings through _json_dumps, for correct escaping).
+_DID_CHANGE_TEMPLATE = (
+    b'{"jsonrpc":"2.0","method":"textDocument/didChange",'
+    b'"params":{"textDocument":{"uri":%s,"version":%d},"contentChanges":%s}}'
+)
+_DID_SAVE_TEMPLATE = b'{"jsonrpc":"2.0","method":"textDocument/didSave","params":{"textDocument":{"uri":%s}}}'
+_HOVER_TEMPLATE = (
+    b'{"jsonrpc":"2.0","method":"textDocument/hover",'
+    b'"params":{"textDocument":{"uri":%s},"position":{"line":%d,"character":%d}},"id":%d}'
+)
+
+# The client capabilities sent with "initialize" never change, so they are serialized once
+# here and spliced into each initialize request with the per-server processId and rootUri.
+_CLIENT_CAPABILITIES: Dict[str, Any] = {
+    "textDocument": {
+        "synchronization": {"willSave": True, "willSaveWaitUntil": False, "didSave": True},
+        "completion": {"completionItem": {"snippetSupport": True}},
+        "hover": {"contentFormat": ["markdown", "plaintext"]},
+        "signatureHelp": {"signatureInformation": {"parameterInformation": {"labelOffsetSupport":True}}},
+        "definition": {"linkSupport": True},
+        "references": {},
+        "documentSymbol": {"hierarchicalDocumentSymbolSupport": True},
+    },
+    "workspace": {
+        "didChangeConfiguration": {"dynamicRegistration": True},
+        "symbol": {"symbolKind": {"valueSet": list(range(1,27))}}, # Support all symbol kinds
+         "executeCommand":{"dynamicRegistration":True}
+    }
+}
+_INITIALIZE_TEMPLATE = (
+    b'{"jsonrpc":"2.0","method":"initialize",'
+    b'"params":{"processId":%d,"rootUri":%s,"capabilities":' + _json_dumps(_CLIENT_CAPABILITIES) + b'},"id":%d}'
+    # Optional params, not sent: "trace": "verbose" (useful for debugging),
+    # "clientInfo": {"name": "TUIDE", "version": "0.1.0"}
+)
+
+# TextDocumentSyncKind values from the LSP specification
+_SYNC_FULL = 1
+_SYNC_INCREMENTAL = 2
+
+def _utf16_len(text: str) -> int:
+    """Length of text in UTF-16 code units, the unit of LSP character offsets."""
+    return len(text) if text.isascii() else len(text.encode('utf-16-le')) // 2
+
+def _diff_to_lsp_changes(old_text: str, new_text: str) -> List[Dict[str, Any]]:
+    """
+    Returns didChange contentChanges that turn old_text into new_text as a single
+    range edit covering the changed lines (common leading and trailing lines are
+    left out). Positions are line-aligned wherever possible, so only lines at the
+    end of the document need their UTF-16 length computed.
+    """
+    if "\r" in old_text or "\r" in new_text:
+        # Lines below are split on "\n" only; a lone "\r" is a line break to the server
+        if old_text.count("\r") != old_text.count("\r\n") or new_text.count("\r") != new_text.count("\r\n"):
+            return [{"text": new_text}]
+    old_lines = old_text.split('\n')
+    new_lines = new_text.split('\n')
+    common = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < common and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < common - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+
+    if suffix:
+        # Replace whole lines, each ending with a newline, in front of the unchanged tail
+        start = {"line": prefix, "character": 0}
+        end = {"line": len(old_lines) - suffix, "character": 0}
+        text = "".join(line + "\n" for line in new_lines[prefix:len(new_lines) - suffix])
+    elif prefix:
+        # The change reaches the end of the document: replace everything after the last unchanged line
+        last_common_line = old_lines[prefix - 1]
+        start = {"line": prefix - 1, "character": _utf16_len(last_common_line)}
+        end = {"line": len(old_lines) - 1, "character": _utf16_len(old_lines[-1])}
+        text = "".join("\n" + line for line in new_lines[prefix:])
+        if last_common_line.endswith("\r"): # Offsets past a line's content stop before its "\r\n"
+            start["character"] -= 1
+            text = "\r" + text
+    else:
+        return [{"text": new_text}] # Nothing in common, a full replacement is smallest
+    return [{"range": {"start": start, "end": end}, "text": text}]
 
 class LSPClient:
+    WRITE_BATCH_MAX_BYTES = 64 * 1024  # Stop adding queued messages to a write batch past this size
+    CHANGE_DEBOUNCE_SECONDS = 0.03  # How long didChange waits for further edits before it is sent
+    STDERR_FLUSH_SECONDS = 0.1  # Server stderr lines are collected and reported at most this often
+    STDERR_READ_SIZE = 4096  # Bytes requested per stderr read
+    STDERR_MAX_LINE_BYTES = 64 * 1024  # A longer unterminated stderr line is reported in pieces
+    PIPE_BUFFER_SIZE = 1024 * 1024  # Kernel buffer for the server's stdin/stdout pipes, where settable
+
     def __init__(
         self,
         language_id: str,
@@ -16,15 +145,42 @@ class LSPClient:
         self.server_command = server_command
         self.project_root = project_root.resolve()
         self.process: Optional[asyncio.subprocess.Process] = None
-        self._message_id_counter = 1
+        # Server stdout. Where pipe sizes can be set, this reads a pipe created by start_server
+        # itself (see _connect_stdout) instead of process.stdout.
+        self._stdout: Optional[asyncio.StreamReader] = None
+        self._stdout_transport: Optional[asyncio.ReadTransport] = None
+        self._message_ids = itertools.count(1) # Request ids; next() is a single C-level call
         self._pending_requests: Dict[int, asyncio.Future] = {}
+        # Request timeouts: a heap of (deadline, msg_id) served by a single timer that is armed
+        # for the earliest deadline, instead of one wait_for() timer per request. Entries of
+        # requests that were answered in time are skipped when they come up.
+        self._request_deadlines: List[Tuple[float, int]] = []
+        self._deadline_timer: Optional[asyncio.TimerHandle] = None
         self.is_initialized = False
         self.on_notification = on_notification
         self.on_error = on_error
         self._reader_task: Optional[asyncio.Task] = None
         self._stderr_reader_task: Optional[asyncio.Task] = None # For reading stderr
-
-    def _create_jsonrpc_request(self, method: str, params: Dict[str, Any], msg_id: Optional[int] = None) -> bytes:
+        # Stderr lines not yet passed to on_error, and the task that will pass them on
+        self._stderr_batch: List[str] = []
+        self._stderr_flush_task: Optional[asyncio.Task] = None
+        # Outgoing messages are queued and written by a single writer task, so a burst of
+        # messages (e.g. didChange per keystroke) is sent with one write and one drain().
+        # None is the sentinel that stops the writer.
+        self._send_queue: Optional["asyncio.Queue[Optional[_Frame]]"] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        # Document URIs by path as passed in, so per-keystroke notifications don't resolve() again.
+        # Set by notify_did_open (or the first other use of a path) and dropped by notify_did_close.
+        self._uri_cache: Dict[Path, str] = {}
+        # Last text sent for each open document (by URI), used to send incremental changes
+        self._doc_texts: Dict[str, str] = {}
+        self._sync_kind = _SYNC_FULL # Server's textDocumentSync change kind, from the initialize response
+        # Latest unsent (version, content) per document. Rapid edits overwrite each other here
+        # and only the last one is sent, by the flush task or before any other message for the file.
+        self._pending_changes: Dict[Path, Tuple[int, str]] = {}
+        self._change_flush_task: Optional[asyncio.Task] = None
+
+    def _create_jsonrpc_request(self, method: str, params: Dict[str, Any], msg_id: Optional[int] = None) -> _Frame:
         message: Dict[str, Any] = {
             "jsonrpc": "2.0",
             "method": method,
@@ -33,41 +189,78 @@ class LSPClient:
         if msg_id is not None:
             message["id"] = msg_id
 
-        content = json.dumps(message).encode('utf-8')
-        header = f"Content-Length: {len(content)}\r\n\r\n".encode('utf-8')
-        return header + content
+        return _frame_message(_json_dumps(message))
+
+    async def _write_to_server(self, frame: _Frame) -> bool:
+        """Queues a message for the writer task. Write errors are reported by the writer task itself."""
+        if self.process and self.process.stdin and self._send_queue and self._writer_task and not self._writer_task.done():
+            self._send_queue.put_nowait(frame)
+            return True
+        return False
+
+    async def _write_loop(self):
+        if not self.process or not self.process.stdin or not self._send_queue:
+            return
+        stdin = self.process.stdin
+        queue = self._send_queue
+        stopping = False
+        while not stopping:
+            frame = await queue.get()
+            if frame is None:
+                break
+            # Take whatever else is already queued, up to WRITE_BATCH_MAX_BYTES
+            batch = list(frame)
+            batch_size = len(frame[1])
+            while batch_size < self.WRITE_BATCH_MAX_BYTES and not queue.empty():
+                frame = queue.get_nowait()
+                if frame is None:
+                    stopping = True
+                    break
+                batch.extend(frame)
+                batch_size += len(frame[1])
 
-    async def _write_to_server(self, data: bytes) -> bool:
-        if self.process and self.process.stdin:
             try:
-                self.process.stdin.write(data)
-                await self.process.stdin.drain()
-                # print(f"LSP SENT ({self.language_id}): {data.decode('utf-8', errors='ignore')[:200]}") # Debug
-                return True
+                stdin.writelines(batch)
+                # drain() only has work to do once the transport has paused writing (its buffer
+                # is past the high-water mark) or has failed; skip the call otherwise
+                transport = stdin.transport
+                if transport.is_closing() or transport.get_write_buffer_size() > self.WRITE_BATCH_MAX_BYTES:
+                    await stdin.drain()
+                # print(f"LSP SENT ({self.language_id}): {len(batch)} message(s), {batch_size} bytes") # Debug
+            except asyncio.CancelledError:
+                raise
             except (ConnectionResetError, BrokenPipeError) as e:
                 # print(f"LSP Error writing to server ({self.language_id}): {e}") # Debug
                 if self.on_error: await self.on_error(f"Connection to LSP server ({self.language_id}) lost: {e}")
                 await self.shutdown_server(force=True)
-                return False
+                return
             except Exception as e: # Catch other potential errors like OSError if process closed unexpectedly
                 # print(f"LSP Unexpected error writing to server ({self.language_id}): {e}") # Debug
                 if self.on_error: await self.on_error(f"Unexpected error writing to LSP server ({self.language_id}): {e}")
                 await self.shutdown_server(force=True)
-                return False
-        return False
+                return
 
     async def _read_stderr_loop(self):
         if not self.process or not self.process.stderr:
             return
+        stderr = self.process.stderr
         try:
+            # Read in blocks and split them into lines here: one wakeup per block rather than
+            # per line, and unlike readline() an overlong line can't exceed the stream's limit
+            partial_line = b""
             while True:
-                line_bytes = await self.process.stderr.readline()
-                if not line_bytes:
+                chunk = await stderr.read(self.STDERR_READ_SIZE)
+                if not chunk:
                     break
-                line = line_bytes.decode('utf-8', errors='replace').rstrip()
-                # print(f"LSP STDERR ({self.language_id}): {line}") # Debug
-                if self.on_error: # Use on_error for stderr for now
-                    await self.on_error(f"LSP Server STDERR ({self.language_id}): {line}")
+                *lines, partial_line = (partial_line + chunk).split(b"\n")
+                if len(partial_line) > self.STDERR_MAX_LINE_BYTES:
+                    lines.append(partial_line)
+                    partial_line = b""
+                for line_bytes in lines:
+                    self._add_stderr_line(line_bytes)
+            if partial_line:
+                self._add_stderr_line(partial_line)
+            await self._flush_stderr() # The server closed stderr (e.g. exited): report what's left now
         except asyncio.CancelledError:
             pass # Task cancelled
         except Exception as e:
@@ -76,19 +269,49 @@ class LSPClient:
                 await self.on_error(f"LSP critical error in stderr read loop ({self.language_id}): {e}")
 
 
+    def _add_stderr_line(self, line_bytes: bytes) -> None:
+        line = line_bytes.decode('utf-8', errors='replace').rstrip()
+        # print(f"LSP STDERR ({self.language_id}): {line}") # Debug
+        if self.on_error: # Use on_error for stderr for now
+            # Chatty servers log hundreds of lines a second; report them in batches
+            self._stderr_batch.append(line)
+            if self._stderr_flush_task is None:
+                self._stderr_flush_task = asyncio.create_task(self._flush_stderr_later())
+
+    async def _flush_stderr_later(self) -> None:
+        await asyncio.sleep(self.STDERR_FLUSH_SECONDS)
+        self._stderr_flush_task = None # Lines arriving from now on schedule a new flush
+        await self._flush_stderr()
+
+    async def _flush_stderr(self) -> None:
+        if not self._stderr_batch:
+            return
+        lines = "\n".join(self._stderr_batch)
+        self._stderr_batch.clear()
+        if self.on_error:
+            await self.on_error(f"LSP Server STDERR ({self.language_id}): {lines}")
+
     async def start_server(self) -> bool:
         if self.process and self.process.returncode is None:
             # print(f"LSP server for {self.language_id} already running.") # Debug
             return True
 
+        # Large responses (e.g. semantic tokens) arrive in fewer, larger reads through a pipe
+        # bigger than the default 64 KiB. asyncio doesn't expose the fd of the stdout pipe it
+        # creates, so on Linux the pipe is created here and passed to the child.
+        stdout_fds = os.pipe() if _F_SETPIPE_SZ is not None else None
+        spawned = False
         try:
+            if stdout_fds:
+                _set_pipe_size(stdout_fds[0], self.PIPE_BUFFER_SIZE)
             # print(f"LSP Starting server for {self.language_id}: {' '.join(self.server_command)}") # Debug
             self.process = await asyncio.create_subprocess_exec(
                 *self.server_command,
                 stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
+                stdout=stdout_fds[1] if stdout_fds else asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
             )
+            spawned = True
         except FileNotFoundError:
             # print(f"LSP Server command not found ({self.language_id}): {self.server_command[0]}") # Debug
             if self.on_error: await self.on_error(f"LSP server command not found ({self.language_id}): {self.server_command[0]}")
@@ -97,38 +320,35 @@ class LSPClient:
             # print(f"LSP Failed to start server ({self.language_id}): {e}") # Debug
             if self.on_error: await self.on_error(f"Failed to start LSP server ({self.language_id}): {e}")
             return False
+        finally:
+            if stdout_fds:
+                os.close(stdout_fds[1]) # The child has its own copy; ours would hide EOF
+                if not spawned:
+                    os.close(stdout_fds[0])
 
         if not self.process: return False
 
+        if stdout_fds:
+            self._stdout = await self._connect_stdout(stdout_fds[0])
+            _set_pipe_size(self.process.stdin.transport.get_extra_info('pipe').fileno(), self.PIPE_BUFFER_SIZE)
+        else:
+            self._stdout = self.process.stdout
+
+        self._send_queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._write_loop())
         self._reader_task = asyncio.create_task(self._read_loop())
         self._stderr_reader_task = asyncio.create_task(self._read_stderr_loop()) # Start stderr reader
         # print(f"LSP Server for {self.language_id} started. PID: {self.process.pid}") # Debug
 
-        initialize_params = {
-            "processId": self.process.pid,
-            "rootUri": self.project_root.as_uri(),
-            "capabilities": {
-                "textDocument": {
-                    "synchronization": {"willSave": True, "willSaveWaitUntil": False, "didSave": True},
-                    "completion": {"completionItem": {"snippetSupport": True}},
-                    "hover": {"contentFormat": ["markdown", "plaintext"]},
-                    "signatureHelp": {"signatureInformation": {"parameterInformation": {"labelOffsetSupport":True}}},
-                    "definition": {"linkSupport": True},
-                    "references": {},
-                    "documentSymbol": {"hierarchicalDocumentSymbolSupport": True},
-                },
-                "workspace": {
-                    "didChangeConfiguration": {"dynamicRegistration": True},
-                    "symbol": {"symbolKind": {"valueSet": list(range(1,27))}}, # Support all symbol kinds
-                     "executeCommand":{"dynamicRegistration":True}
-                }
-            },
-            # "trace": "verbose", # Useful for debugging
-            # "clientInfo": {"name": "TUIDE", "version": "0.1.0"}, # Optional
-        }
+        pid = self.process.pid
+        root_uri_json = _json_dumps(self.project_root.as_uri())
 
         try:
-            init_response = await self.send_request("initialize", initialize_params, timeout=10.0)
+            init_response = await self._send_encoded_request(
+                "initialize",
+                lambda msg_id: _frame_message(_INITIALIZE_TEMPLATE % (pid, root_uri_json, msg_id)),
+                timeout=10.0,
+            )
             if init_response is None:
                 # print(f"LSP Initialize for {self.language_id} failed or timed out.") # Debug
                 if self.on_error: await self.on_error(f"LSP Initialize for {self.language_id} timed out or failed.")
@@ -137,6 +357,10 @@ class LSPClient:
 
             # print(f"LSP Initialize response for {self.language_id}: {json.dumps(init_response, indent=2)[:500]}") # Debug
             # TODO: Store server_capabilities = init_response.get('capabilities')
+            text_document_sync = (init_response.get("capabilities") or {}).get("textDocumentSync")
+            if isinstance(text_document_sync, dict):
+                text_document_sync = text_document_sync.get("change")
+            self._sync_kind = text_document_sync if isinstance(text_document_sync, int) else _SYNC_FULL
 
             await self.send_notification("initialized", {})
             self.is_initialized = True
@@ -148,79 +372,63 @@ class LSPClient:
             await self.shutdown_server(force=True)
             return False
 
+    async def _connect_stdout(self, read_fd: int) -> asyncio.StreamReader:
+        """Wraps the parent end of the server's stdout pipe in a StreamReader, like process.stdout."""
+        reader = asyncio.StreamReader()
+        self._stdout_transport, _ = await asyncio.get_running_loop().connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), open(read_fd, 'rb', buffering=0)
+        )
+        return reader
+
     async def _read_loop(self):
-        if not self.process or not self.process.stdout: return
+        if not self._stdout: return
 
-        buffer = bytearray()
-        content_length: Optional[int] = None
+        stdout = self._stdout
 
         while True:
             try:
-                if content_length is None:
-                    header_buffer = bytearray()
-                    while True:
-                        if not self.process or self.process.stdout.at_eof(): return
-                        line = await self.process.stdout.readline()
-                        if not line: return
-                        header_buffer.extend(line)
-                        if b'\r\n\r\n' in header_buffer:
-                            header_part, _, body_start_buffer = header_buffer.partition(b'\r\n\r\n')
-                            buffer.extend(body_start_buffer)
-                            headers_str = header_part.decode('ascii', errors='ignore')
-                            for h_line in headers_str.split('\r\n'):
-                                if h_line.lower().startswith("content-length:"):
-                                    content_length = int(h_line.split(":")[1].strip())
-                                    break
-                            if content_length is None and header_part:
-                                # print(f"LSP Warning ({self.language_id}): Received headers without Content-Length: {headers_str}") # Debug
-                                buffer = header_part + b'\r\n\r\n' + buffer # Put it all back
-                            break
-
-                    if content_length is None:
-                        if buffer:
-                            # print(f"LSP Malformed headers ({self.language_id}), buffer: {buffer[:100]}") # Debug
-                            buffer.clear()
-                        await asyncio.sleep(0.01)
-                        continue
-
-                if len(buffer) < content_length:
-                    if not self.process or self.process.stdout.at_eof(): return
-                    required_bytes = content_length - len(buffer)
-                    chunk = await self.process.stdout.read(required_bytes)
-                    if not chunk: return
-                    buffer.extend(chunk)
-
-                if len(buffer) >= content_length:
-                    body_bytes = buffer[:content_length]
-                    buffer = buffer[content_length:]
-                    current_content_length = content_length # Store for this message processing
-                    content_length = None # Reset for next message's headers
-
-                    try:
-                        message_data = json.loads(body_bytes.decode('utf-8'))
-                        # print(f"LSP RECV ({self.language_id}): {json.dumps(message_data, indent=2)[:500]}") # Debug
-                        if "id" in message_data:
-                            msg_id = message_data["id"]
-                            if msg_id in self._pending_requests:
-                                if "error" in message_data:
-                                     self._pending_requests.pop(msg_id).set_exception(
-                                         RuntimeError(f"LSP Error Response: {message_data['error']}")
-                                     )
-                                else:
-                                    self._pending_requests.pop(msg_id).set_result(message_data.get("result"))
-                            # else:
-                                # print(f"LSP Warning ({self.language_id}): Received response for unknown message ID: {msg_id}") # Debug
-                        else:
-                            if self.on_notification:
-                                await self.on_notification(message_data)
-                    except json.JSONDecodeError:
-                        # print(f"LSP JSONDecodeError ({self.language_id}): {body_bytes.decode('utf-8',errors='ignore')[:200]}") # Debug
-                        if self.on_error: await self.on_error(f"LSP ({self.language_id}) received invalid JSON")
-                    except Exception as e:
-                        # print(f"LSP Error processing message ({self.language_id}): {e}") # Debug
-                        if self.on_error: await self.on_error(f"LSP ({self.language_id}) error processing message: {e}")
-                else:
-                     await asyncio.sleep(0.01) # Not enough data yet for full body
+                # The StreamReader finds the end of the header block and reads the body
+                # in its own buffer, without a Python-level loop over lines or chunks.
+                try:
+                    header_block = await stdout.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError: # EOF, the server went away
+                    return
+
+                # Header names are case-insensitive; the block always ends in \r\n\r\n
+                length_pos = header_block.lower().find(b"content-length:")
+                if length_pos == -1:
+                    # print(f"LSP Malformed headers ({self.language_id}): {header_block[:100]}") # Debug
+                    continue # Skip the block; readuntil() waits for the next one without polling
+                content_length = int(header_block[length_pos + 15:header_block.find(b'\r\n', length_pos)])
+
+                try:
+                    body_bytes = await stdout.readexactly(content_length)
+                except asyncio.IncompleteReadError: # EOF in the middle of a message
+                    return
+
+                try:
+                    message_data = _json_loads(body_bytes)
+                    # print(f"LSP RECV ({self.language_id}): {json.dumps(message_data, indent=2)[:500]}") # Debug
+                    if "id" in message_data:
+                        msg_id = message_data["id"]
+                        if msg_id in self._pending_requests:
+                            if "error" in message_data:
+                                 self._pending_requests.pop(msg_id).set_exception(
+                                     RuntimeError(f"LSP Error Response: {message_data['error']}")
+                                 )
+                            else:
+                                self._pending_requests.pop(msg_id).set_result(message_data.get("result"))
+                        # else:
+                            # print(f"LSP Warning ({self.language_id}): Received response for unknown message ID: {msg_id}") # Debug
+                    else:
+                        if self.on_notification:
+                            await self.on_notification(message_data)
+                except json.JSONDecodeError: # orjson.JSONDecodeError is a subclass
+                    # print(f"LSP JSONDecodeError ({self.language_id}): {body_bytes.decode('utf-8',errors='ignore')[:200]}") # Debug
+                    if self.on_error: await self.on_error(f"LSP ({self.language_id}) received invalid JSON")
+                except Exception as e:
+                    # print(f"LSP Error processing message ({self.language_id}): {e}") # Debug
+                    if self.on_error: await self.on_error(f"LSP ({self.language_id}) error processing message: {e}")
 
             except asyncio.CancelledError:
                 # print(f"LSP Reader task cancelled ({self.language_id}).") # Debug
@@ -233,26 +441,39 @@ class LSPClient:
         # print(f"LSP Reader task finished ({self.language_id}).") # Debug
 
     async def send_request(self, method: str, params: Dict[str, Any], timeout: Optional[float] = 5.0) -> Optional[Any]:
+        return await self._send_encoded_request(
+            method, lambda msg_id: self._create_jsonrpc_request(method, params, msg_id), timeout
+        )
+
+    async def _send_encoded_request(
+        self, method: str, encode: Callable[[int], _Frame], timeout: Optional[float] = 5.0
+    ) -> Optional[Any]:
+        """send_request for a message already serialized by encode(msg_id)."""
         if not self.process or self.process.returncode is not None: # Check if process is running
             # print(f"LSP ({self.language_id}): Cannot send request, server not running.") # Debug
             return None
 
-        self._message_id_counter += 1
-        msg_id = self._message_id_counter
+        msg_id = next(self._message_ids)
 
         future: asyncio.Future[Any] = asyncio.Future()
         self._pending_requests[msg_id] = future
 
-        data = self._create_jsonrpc_request(method, params, msg_id)
-        if not await self._write_to_server(data):
+        if not await self._write_to_server(encode(msg_id)):
             self._pending_requests.pop(msg_id, None)
             return None
+        if timeout is not None:
+            self._add_request_deadline(msg_id, timeout)
 
         try:
-            return await asyncio.wait_for(future, timeout=timeout)
-        except asyncio.TimeoutError:
+            return await future
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling(): # The caller itself was cancelled
+                self._pending_requests.pop(msg_id, None)
+                raise
+            # shutdown_server cancelled the request: the server is gone
+            return None
+        except asyncio.TimeoutError: # Set by _expire_requests, which also popped the request
             # print(f"LSP Request {method} (id: {msg_id}) timed out for {self.language_id}.") # Debug
-            self._pending_requests.pop(msg_id, None)
             if self.on_error: await self.on_error(f"LSP request {method} (id: {msg_id}) timed out for {self.language_id}.")
             return None
         except RuntimeError as e: # Catch error set by _read_loop for LSP error responses
@@ -266,18 +487,59 @@ class LSPClient:
             if self.on_error: await self.on_error(f"LSP error for {method} (id: {msg_id}, lang: {self.language_id}): {e}")
             return None
 
+    def _add_request_deadline(self, msg_id: int, timeout: float) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        heapq.heappush(self._request_deadlines, (deadline, msg_id))
+        if self._deadline_timer is None or deadline < self._deadline_timer.when():
+            if self._deadline_timer is not None:
+                self._deadline_timer.cancel()
+            self._deadline_timer = loop.call_at(deadline, self._expire_requests)
+
+    def _expire_requests(self) -> None:
+        """Timer callback: fails every request whose deadline has passed, then re-arms for the next one."""
+        self._deadline_timer = None
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        deadlines = self._request_deadlines
+        while deadlines and deadlines[0][0] <= now:
+            _, msg_id = heapq.heappop(deadlines)
+            future = self._pending_requests.pop(msg_id, None)
+            if future is not None and not future.done():
+                future.set_exception(asyncio.TimeoutError())
+        if deadlines:
+            self._deadline_timer = loop.call_at(deadlines[0][0], self._expire_requests)
+
     async def send_notification(self, method: str, params: Dict[str, Any]) -> bool:
         if not self.process or self.process.returncode is not None:
             # print(f"LSP ({self.language_id}): Cannot send notification, server not running.") # Debug
             return False
-        data = self._create_jsonrpc_request(method, params)
-        return await self._write_to_server(data)
+        return await self._write_to_server(self._create_jsonrpc_request(method, params))
+
+    async def _send_encoded_notification(self, frame: _Frame) -> bool:
+        """send_notification for a message that is already serialized and framed."""
+        if not self.process or self.process.returncode is not None:
+            return False
+        return await self._write_to_server(frame)
+
+    def _uri(self, file_path: Path) -> str:
+        uri = self._uri_cache.get(file_path)
+        if uri is None:
+            uri = file_path.resolve().as_uri()
+            self._uri_cache[file_path] = uri
+        return uri
 
     async def notify_did_open(self, file_path: Path, file_content: str, language_id_override: Optional[str] = None) -> None:
         if not self.is_initialized: return
+        self._pending_changes.pop(file_path, None) # Superseded by the full text below
+        # didOpen establishes the document's URI: resolve it here, once, and let every later
+        # notification and request for the file reuse it without touching the filesystem
+        uri = file_path.resolve().as_uri()
+        self._uri_cache[file_path] = uri
+        self._doc_texts[uri] = file_content
         params = {
             "textDocument": {
-                "uri": file_path.resolve().as_uri(),
+                "uri": uri,
                 "languageId": language_id_override or self.language_id,
                 "version": 1, "text": file_content,
             }
@@ -285,44 +547,70 @@ class LSPClient:
         await self.send_notification("textDocument/didOpen", params)
 
     async def notify_did_change(self, file_path: Path, new_content: str, version: int, language_id_override: Optional[str] = None) -> None:
+        """
+        Debounced: the change is sent after CHANGE_DEBOUNCE_SECONDS, and only if no newer
+        change for the same file arrived in the meantime (the server then gets the newest
+        content directly). Pending changes are flushed before any other message for the file.
+        """
         if not self.is_initialized: return
-        params = {
-            "textDocument": {"uri": file_path.resolve().as_uri(), "version": version},
-            "contentChanges": [{"text": new_content}]
-        }
-        await self.send_notification("textDocument/didChange", params)
+        self._pending_changes[file_path] = (version, new_content)
+        if self._change_flush_task is None:
+            self._change_flush_task = asyncio.create_task(self._flush_changes_later())
+
+    async def _flush_changes_later(self) -> None:
+        await asyncio.sleep(self.CHANGE_DEBOUNCE_SECONDS)
+        self._change_flush_task = None # Edits arriving from now on schedule a new flush
+        for file_path in list(self._pending_changes):
+            await self._flush_pending_change(file_path)
+
+    async def _flush_pending_change(self, file_path: Path) -> None:
+        pending = self._pending_changes.pop(file_path, None)
+        if pending is not None:
+            await self._send_did_change(file_path, *pending)
+
+    async def _send_did_change(self, file_path: Path, version: int, new_content: str) -> None:
+        uri = self._uri(file_path)
+        old_content = self._doc_texts.get(uri)
+        self._doc_texts[uri] = new_content
+        if self._sync_kind == _SYNC_INCREMENTAL and old_content is not None:
+            # Send only the changed lines instead of the whole document
+            content_changes = _diff_to_lsp_changes(old_content, new_content)
+        else:
+            content_changes = [{"text": new_content}]
+        await self._send_encoded_notification(_frame_message(
+            _DID_CHANGE_TEMPLATE % (_json_dumps(uri), version, _json_dumps(content_changes))
+        ))
 
     async def notify_did_save(self, file_path: Path) -> None:
         if not self.is_initialized: return
-        params = {"textDocument": {"uri": file_path.resolve().as_uri()}}
-        await self.send_notification("textDocument/didSave", params)
+        await self._flush_pending_change(file_path)
+        await self._send_encoded_notification(_frame_message(
+            _DID_SAVE_TEMPLATE % _json_dumps(self._uri(file_path))
+        ))
+
+    async def notify_did_close(self, file_path: Path) -> None:
+        self._pending_changes.pop(file_path, None) # The server forgets the document anyway
+        uri = self._uri_cache.pop(file_path, None) or file_path.resolve().as_uri()
+        self._doc_texts.pop(uri, None)
+        if not self.is_initialized: return
+        params = {"textDocument": {"uri": uri}}
+        await self.send_notification("textDocument/didClose", params)
 
     async def request_hover(self, file_path: Path, line: int, character: int) -> Optional[Dict[str, Any]]:
         if not self.is_initialized: return None
-        params = {
-            "textDocument": {"uri": file_path.resolve().as_uri()},
-            "position": {"line": line, "character": character},
-        }
-        return await self.send_request("textDocument/hover", params)
+        await self._flush_pending_change(file_path) # Hover must see the latest content
+        uri_json = _json_dumps(self._uri(file_path))
+        return await self._send_encoded_request(
+            "textDocument/hover",
+            lambda msg_id: _frame_message(_HOVER_TEMPLATE % (uri_json, line, character, msg_id)),
+        )
 
     async def shutdown_server(self, force: bool = False) -> None:
         # print(f"LSP Shutting down server for {self.language_id} (force={force})...") # Debug
 
-        # Cancel reader tasks first
-        if self._reader_task and not self._reader_task.done():
-            self._reader_task.cancel()
-            try: await self._reader_task
-            except asyncio.CancelledError: pass
-        if self._stderr_reader_task and not self._stderr_reader_task.done():
-            self._stderr_reader_task.cancel()
-            try: await self._stderr_reader_task
-            except asyncio.CancelledError: pass
-
-        self._reader_task = None
-        self._stderr_reader_task = None
-
-        if self.process and self.process.returncode is None:
-            if self.is_initialized and not force:
+        if self.process and self.process.returncode is None and not force:
+            # The reader tasks keep running here so the shutdown response can arrive
+            if self.is_initialized:
                 try:
                     await self.send_request("shutdown", {}, timeout=2.0)
                 except Exception: # Ignore errors during shutdown sequence if force=False
@@ -330,34 +618,71 @@ class LSPClient:
                 # send_notification returns bool, but we don't act on it here
                 await self.send_notification("exit", {})
 
-            if not force:
+            # Let the writer flush what is already queued (including "exit"), then stop it
+            if self._send_queue and self._writer_task and not self._writer_task.done():
+                self._send_queue.put_nowait(None)
+                try: await asyncio.wait_for(asyncio.shield(self._writer_task), timeout=1.0)
+                except asyncio.TimeoutError: pass
+
+            try: await asyncio.wait_for(self.process.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                # print(f"LSP Server ({self.language_id}) didn't exit gracefully, will terminate.") # Debug
+                pass
+
+        # Cancel the I/O tasks together. One of them may be the task running this
+        # shutdown (after a read or write error), which must not await itself.
+        current_task = asyncio.current_task()
+        tasks = [
+            task for task in (
+                self._reader_task, self._stderr_reader_task, self._writer_task,
+                self._change_flush_task, self._stderr_flush_task,
+            )
+            if task and not task.done() and task is not current_task
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._reader_task = None
+        self._stderr_reader_task = None
+        self._writer_task = None
+        self._send_queue = None
+        self._change_flush_task = None
+        self._pending_changes.clear()
+        self._stderr_flush_task = None
+        self._stderr_batch.clear()
+
+        if self.process and self.process.returncode is None: # Still running
+            try:
+                self.process.terminate()
                 try: await asyncio.wait_for(self.process.wait(), timeout=1.0)
                 except asyncio.TimeoutError:
-                    # print(f"LSP Server ({self.language_id}) didn't exit gracefully, will terminate.") # Debug
-                    pass
+                    # print(f"LSP Server ({self.language_id}) didn't terminate in time, killing.") # Debug
+                    self.process.kill()
+                    await self.process.wait()
+            except ProcessLookupError: pass # Already gone
+            except Exception as e:
+                 # print(f"LSP Exception during server termination ({self.language_id}): {e}") # Debug
+                 pass
 
-            if self.process.returncode is None: # Still running
-                try:
-                    self.process.terminate()
-                    await asyncio.wait_for(self.process.wait(), timeout=1.0)
-                    if self.process.returncode is None:
-                        self.process.kill()
-                        await self.process.wait()
-                except ProcessLookupError: pass # Already gone
-                except asyncio.TimeoutError: # Failed to kill or terminate in time
-                     # print(f"LSP Server ({self.language_id}) failed to terminate/kill in time.") # Debug
-                     pass
-                except Exception as e:
-                     # print(f"LSP Exception during server termination ({self.language_id}): {e}") # Debug
-                     pass
+        if self._stdout_transport is not None:
+            self._stdout_transport.close()
+            self._stdout_transport = None
+        self._stdout = None
 
         self.is_initialized = False
         self.process = None
-        # Clear pending requests, potentially failing them
+        # Clear pending requests; their callers get None (see _send_encoded_request)
         for fut in self._pending_requests.values():
             if not fut.done():
-                fut.set_exception(ConnectionError(f"LSP Client ({self.language_id}) shutting down"))
+                fut.cancel()
         self._pending_requests.clear()
+        if self._deadline_timer is not None:
+            self._deadline_timer.cancel()
+            self._deadline_timer = None
+        self._request_deadlines.clear()
+        # Document state belongs to this server session; a restarted server gets didOpen again
+        self._uri_cache.clear()
+        self._doc_texts.clear()
         # print(f"LSP Server for {self.language_id} shut down complete.") # Debug
 
 async def main_lsp_test():
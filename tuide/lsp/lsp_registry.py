@@ -0,0 +1,42 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from tuide.lsp.lsp_client import LSPClient
+
+class LSPRegistry:
+    """
+    Holds the running LSP clients, one per language id, and fans requests out to all
+    of them concurrently so a multi-language request takes as long as the slowest
+    server rather than the sum of all of them.
+    """
+
+    def __init__(self):
+        self.clients: Dict[str, LSPClient] = {}
+
+    def add_client(self, client: LSPClient) -> None:
+        self.clients[client.language_id] = client
+
+    def get_client(self, language_id: str) -> Optional[LSPClient]:
+        return self.clients.get(language_id)
+
+    async def hover_all(self, file_path: Path, line: int, character: int) -> List[Any]:
+        """
+        Requests hover information from every client at once.
+
+        Returns:
+            One entry per client, in registration order: the hover result, None if the
+            server had nothing (or timed out), or the exception the request raised.
+        """
+        return await asyncio.gather(
+            *(client.request_hover(file_path, line, character) for client in self.clients.values()),
+            return_exceptions=True,
+        )
+
+    async def shutdown_all(self) -> None:
+        """Shuts down every client concurrently and forgets them."""
+        await asyncio.gather(
+            *(client.shutdown_server() for client in self.clients.values()),
+            return_exceptions=True,
+        )
+        self.clients.clear()
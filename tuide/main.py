@@ -1,19 +1,39 @@
+import asyncio
+import os
+import stat
 import sys
 from pathlib import Path
-from typing import Optional, Type
+from typing import Any, Dict, Mapping, Optional, Type
 
 from textual.app import App, ComposeResult, Binding # Binding was imported twice
 from textual.containers import Horizontal, Vertical
-from textual.css.query import DOMQuery # Added DOMQuery import
+from textual.css.query import NoMatches
 from textual.widgets import Header, Footer, TabbedContent, TabPane, Label, Markdown # Markdown not used
 from textual.reactive import reactive
+from rich.markup import escape
 
 # Assuming these are in tuide.ui and tuide.core respectively
 from tuide.ui.file_explorer_widget import FileExplorerWidget
 from tuide.ui.editor_widget import EditorWidget # EditorWidget was imported twice
 from tuide.core.workspace import Workspace
+from tuide.core.config_manager import ConfigManager
+from tuide.lsp.lsp_client import LSPClient
+from tuide.lsp.lsp_registry import LSPRegistry
 from tuide.widgets.welcome import WelcomeWidget # A new simple placeholder widget
 
+DEFAULT_CONFIG_PATH = Path(__file__).parent / "config" / "default.json"
+
+def _hover_text(result: Any) -> str:
+    """Plain text of an LSP Hover result (MarkupContent, MarkedString or a list of them)."""
+    contents = result.get("contents") if isinstance(result, dict) else None
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, dict): # MarkupContent or {language, value}
+        return contents.get("value", "")
+    if isinstance(contents, list):
+        return "\n".join(filter(None, (_hover_text({"contents": item}) for item in contents)))
+    return ""
+
 class TUIDEApp(App[None]): # App[None] is fine, or App without typevar if no result needed on exit
     TITLE = "TUIDE - Terminal IDE"
 
@@ -23,6 +43,8 @@ class TUIDEApp(App[None]): # App[None] is fine, or App without typevar if no res
         Binding("ctrl+q", "quit", "Quit", show=True, priority=True),
         Binding("ctrl+s", "save_active_editor", "Save", show=True),
         Binding("ctrl+w", "close_active_tab", "Close Tab", show=True),
+        Binding("f2", "hover", "Hover", show=True),
+        Binding("f5", "refresh_explorer", "Refresh", show=True),
         Binding("ctrl+p", "command_palette", "Cmd Palette", show=True), # Placeholder
         # Add more bindings: e.g. new file, open file dialog
     ]
@@ -34,16 +56,32 @@ class TUIDEApp(App[None]): # App[None] is fine, or App without typevar if no res
         super().__init__(**kwargs)
         project_path_arg: Optional[Path] = None
         self._initial_file_to_open: Optional[Path] = None # Ensure this is initialized
+        self._startup_stat: Optional[os.stat_result] = None # Stat of the initial file, reused when opening it
 
         if len(sys.argv) > 1:
             path_arg = Path(sys.argv[1])
-            if path_arg.is_dir():
+            try:
+                st = os.stat(path_arg) # One stat answers both "dir?" and "file?"
+            except (OSError, ValueError): # Missing path: fall back to the CWD as before
+                st = None
+            if st is not None and stat.S_ISDIR(st.st_mode):
                 project_path_arg = path_arg.resolve()
-            elif path_arg.is_file(): # If a single file is passed, use its parent dir
+            elif st is not None and stat.S_ISREG(st.st_mode): # If a single file is passed, use its parent dir
                 project_path_arg = path_arg.parent.resolve()
                 self._initial_file_to_open = path_arg.resolve() # Store the file to open
+                self._startup_stat = st
 
         self.workspace = Workspace(project_root=project_path_arg)
+        self.config = ConfigManager(system_config_path=DEFAULT_CONFIG_PATH, workspace_root=self.workspace.project_root)
+        self.lsp_registry = LSPRegistry() # Language servers, queried concurrently
+        # Language id -> task starting its server, so files opened while it starts share one server
+        self._lsp_starts: Dict[str, "asyncio.Task[Optional[LSPClient]]"] = {}
+        # Documents open in a language server -> version of the last text sent for them
+        self._lsp_versions: Dict[Path, int] = {}
+        # Resolved file path -> id of its editor tab, so finding a file's tab needs no DOM query
+        self._tab_index: Dict[Path, str] = {}
+        # Built once; hidden rather than removed while files are open, so it is never rebuilt
+        self._welcome_pane = TabPane("Welcome", WelcomeWidget(), id="welcome_tab")
 
 
     def compose(self) -> ComposeResult:
@@ -55,72 +93,127 @@ class TUIDEApp(App[None]): # App[None] is fine, or App without typevar if no res
                 yield Label("Error: Workspace not initialized.", id="file_explorer_error")
 
             with TabbedContent(id="editor_tabs", initial="welcome_tab"):
-                yield TabPane("Welcome", WelcomeWidget(), id="welcome_tab")
+                yield self._welcome_pane
         yield Footer()
 
     async def on_mount(self) -> None:
         try:
             self.query_one(FileExplorerWidget).focus()
-        except Exception: # If FileExplorerWidget failed to load, e.g. due to bad path
+        except NoMatches: # If FileExplorerWidget failed to load, e.g. due to bad path
             pass # Error already potentially shown by compose
 
         if self._initial_file_to_open and self.workspace:
-            # Ensure workspace is available and path is valid before trying to open
-            if self._initial_file_to_open.exists():
-                await self._open_file_in_editor(self._initial_file_to_open)
-            else:
-                self.notify(f"Initial file not found: {self._initial_file_to_open}", severity="warning")
+            # Checked to be a regular file in __init__; _open_file_in_editor reuses that stat
+            await self._open_file_in_editor(self._initial_file_to_open, self._startup_stat)
 
 
-    async def _open_file_in_editor(self, file_path: Path) -> None:
+    async def _open_file_in_editor(self, file_path: Path, st: Optional[os.stat_result] = None) -> None:
         if not self.workspace:
             self.notify("Workspace not available.", severity="error")
             return
 
-        # Ensure file_path is absolute and resolved
-        abs_file_path = file_path.resolve()
+        # Ensure file_path is absolute and resolved (memoized by the workspace)
+        abs_file_path = self.workspace.resolve(file_path)
 
-        if not abs_file_path.is_file():
+        is_file = stat.S_ISREG(st.st_mode) if st is not None else abs_file_path.is_file()
+        if not is_file: # The memoized resolution may be stale (renamed directory, retargeted symlink)
+            abs_file_path = self.workspace.resolve(file_path, refresh=True)
+            is_file = abs_file_path.is_file()
+        if not is_file:
             self.notify(f"Cannot open: '{abs_file_path.name}' is not a file or does not exist.", severity="error")
             return
 
-        self.workspace.open_file(abs_file_path) # Manage workspace state
+        self.workspace.open_file(abs_file_path, validate=False) # Manage workspace state; is_file() checked above
 
         editor_tabs = self.query_one(TabbedContent)
 
-        tab_id_to_activate = f"tab_{abs_file_path}" # Use resolved path for ID
-
-        try:
-            existing_pane_query: DOMQuery[TabPane] = editor_tabs.query(f"#{tab_id_to_activate}")
-            if existing_pane_query and not existing_pane_query.is_empty: # Check if query returned anything
-                active_pane = existing_pane_query.first()
-                editor_tabs.active = tab_id_to_activate
-                editor_widget = active_pane.query_one(EditorWidget)
-                editor_widget.focus()
-                return
-        except Exception as e: # Catch potential errors if query syntax is bad or widget missing
-            self.notify(f"Error focusing existing tab: {e}", severity="error")
-
-
-        # If welcome tab is the only one and active, remove it
-        if editor_tabs.active == "welcome_tab" and editor_tabs.tab_count == 1:
+        if abs_file_path in self._tab_index:
             try:
-                await editor_tabs.remove_pane("welcome_tab")
-            except Exception as e: # Tab might not exist
-                self.notify(f"Could not remove welcome tab: {e}", severity="warning")
+                editor_tabs.active = self._tab_index[abs_file_path]
+                editor_tabs.get_pane(self._tab_index[abs_file_path]).query_one(EditorWidget).focus()
+                return
+            except NoMatches as e: # The pane or widget went missing
+                self._tab_index.pop(abs_file_path, None)
+                self.notify(f"Error focusing existing tab: {e}", severity="error")
 
 
         language = abs_file_path.suffix.lstrip(".") if abs_file_path.suffix else None
 
-        editor_widget = EditorWidget(file_path=abs_file_path, language=language)
+        editor_widget = EditorWidget(file_path=abs_file_path, language=language, workspace=self.workspace)
+        tab_id_to_activate = editor_widget.tab_id
         new_tab_pane = TabPane(
             abs_file_path.name,
             editor_widget,
             id=tab_id_to_activate
         )
-        await editor_tabs.add_pane(new_tab_pane)
-        editor_tabs.active = tab_id_to_activate
+        with self.batch_update(): # One screen update for hiding welcome, adding and activating the tab
+            # If welcome tab is the only one and active, hide it
+            if editor_tabs.active == "welcome_tab" and editor_tabs.tab_count == 1:
+                try:
+                    editor_tabs.hide_tab("welcome_tab")
+                except NoMatches as e: # Tab might not exist
+                    self.notify(f"Could not hide welcome tab: {e}", severity="warning")
+
+            await editor_tabs.add_pane(new_tab_pane)
+            self._tab_index[abs_file_path] = tab_id_to_activate
+            editor_tabs.active = tab_id_to_activate
         # EditorWidget's on_mount should handle focusing itself after loading content.
+        # The language server is told about the file once the editor has loaded it (on_editor_widget_loaded).
+
+    def _lsp_language_id(self, file_path: Path) -> Optional[str]:
+        associations = self.config.get("file_associations", {})
+        return associations.get(file_path.suffix.lower()) if isinstance(associations, Mapping) else None
+
+    async def _start_language_server(self, language_id: str) -> Optional[LSPClient]:
+        server = self.config.get(["lsp_servers", language_id])
+        if not isinstance(server, Mapping) or not server.get("enabled") or not server.get("command"):
+            return None
+        client = LSPClient(language_id, server["command"], self.workspace.project_root, on_error=self._on_lsp_error)
+        if not await client.start_server():
+            self.notify(f"Language server for {language_id} could not be started.", severity="warning")
+            return None
+        self.lsp_registry.add_client(client)
+        return client
+
+    async def _lsp_client_for(self, file_path: Path) -> Optional[LSPClient]:
+        """The client for the file's language, starting its server on first use."""
+        language_id = self._lsp_language_id(file_path)
+        if language_id is None:
+            return None
+        task = self._lsp_starts.get(language_id)
+        if task is None:
+            task = self._lsp_starts[language_id] = asyncio.create_task(self._start_language_server(language_id))
+        client = await asyncio.shield(task) # One file's worker being cancelled doesn't abort the shared start
+        if client is None and self._lsp_starts.get(language_id) is task:
+            del self._lsp_starts[language_id] # Not started: the next file of this language tries again
+        return client
+
+    async def _lsp_open_document(self, editor: EditorWidget) -> None:
+        file_path = editor.file_path
+        client = await self._lsp_client_for(file_path)
+        if client is None or self._tab_index.get(file_path) != editor.tab_id: # Tab closed meanwhile
+            return
+        # The editor's text, read now, includes any edits made while the server was starting
+        self._lsp_versions[file_path] = 1
+        await client.notify_did_open(file_path, editor.text)
+
+    def on_editor_widget_loaded(self, event: EditorWidget.Loaded) -> None:
+        if event.editor.file_path is not None:
+            self.run_worker(self._lsp_open_document(event.editor), group="lsp")
+
+    async def on_editor_widget_changed(self, event: EditorWidget.Changed) -> None:
+        file_path = event.editor.file_path
+        version = self._lsp_versions.get(file_path)
+        if version is None: # Not open in a server (yet); didOpen will carry the current text
+            return
+        client = self._lsp_started_client(file_path)
+        if client is None:
+            return
+        self._lsp_versions[file_path] = version + 1
+        await client.notify_did_change(file_path, event.editor.text, version + 1) # Debounced by the client
+
+    async def _on_lsp_error(self, message: str) -> None:
+        self.log.warning(message) # Servers report routine stderr output here too; keep it out of notifications
 
     async def on_directory_tree_file_selected(
         self, event: FileExplorerWidget.FileSelected # Corrected class name
@@ -131,21 +224,26 @@ class TUIDEApp(App[None]): # App[None] is fine, or App without typevar if no res
     async def action_save_active_editor(self) -> None:
         editor_tabs = self.query_one(TabbedContent)
         active_tab_id = editor_tabs.active
-        if active_tab_id and active_tab_id != "welcome_tab":
-            try:
-                active_pane = editor_tabs.get_pane(active_tab_id)
-                editor_widget = active_pane.query_one(EditorWidget)
-                if editor_widget.file_path:
-                    success = await editor_widget.save_file()
-                    if success:
-                        self.notify(f"File '{editor_widget.file_path.name}' saved.")
-                    else:
-                        self.notify(f"Failed to save '{editor_widget.file_path.name}'.", severity="error")
-                else:
-                    # TODO: Implement Save As functionality (e.g., prompt for filename)
-                    self.notify("Save As not yet implemented (file has no path).", severity="warning")
-            except Exception as e: # Catch errors like pane not found or widget missing
-                self.notify(f"Error saving file: {e}", severity="error")
+        if not active_tab_id or active_tab_id == "welcome_tab":
+            return
+        try:
+            editor_widget = editor_tabs.get_pane(active_tab_id).query_one(EditorWidget)
+        except NoMatches as e: # Pane not found or widget missing
+            self.notify(f"Error saving file: {e}", severity="error")
+            return
+
+        if editor_widget.file_path:
+            success = await editor_widget.save_file() # Reports its own I/O errors
+            if success:
+                self.notify(f"File '{editor_widget.file_path.name}' saved.")
+                client = self._lsp_started_client(editor_widget.file_path)
+                if client is not None and editor_widget.file_path in self._lsp_versions:
+                    await client.notify_did_save(editor_widget.file_path)
+            else:
+                self.notify(f"Failed to save '{editor_widget.file_path.name}'.", severity="error")
+        else:
+            # TODO: Implement Save As functionality (e.g., prompt for filename)
+            self.notify("Save As not yet implemented (file has no path).", severity="warning")
 
 
     async def action_close_active_tab(self) -> None:
@@ -160,40 +258,76 @@ class TUIDEApp(App[None]): # App[None] is fine, or App without typevar if no res
             return
 
         try:
-            active_pane = editor_tabs.get_pane(active_tab_id)
-            editor_widget = active_pane.query_one(EditorWidget)
-            file_to_close = editor_widget.file_path # This should be Path object from EditorWidget
+            editor_widget = editor_tabs.get_pane(active_tab_id).query_one(EditorWidget)
+        except NoMatches as e: # Pane not found or widget missing
+            self.notify(f"Error closing tab: {e}", severity="error")
+            return
+        file_to_close = editor_widget.file_path # This should be Path object from EditorWidget
 
+        with self.batch_update(): # Removing, re-activating and showing welcome render once
             await editor_tabs.remove_pane(active_tab_id) # Remove tab first
 
             if file_to_close: # file_to_close could be None if it's a new, unsaved editor
+                self._tab_index.pop(file_to_close, None)
+                client = self._lsp_started_client(file_to_close)
+                if self._lsp_versions.pop(file_to_close, None) is not None and client is not None:
+                    await client.notify_did_close(file_to_close)
                 self.workspace.close_file(file_to_close)
 
                 new_active_ws_file = self.workspace.active_file # Get new active file from workspace
-                if new_active_ws_file:
-                    new_active_tab_id = f"tab_{new_active_ws_file.resolve()}"
+                new_active_tab_id = self._tab_index.get(new_active_ws_file) if new_active_ws_file else None
+                # No tab id: the new active file from workspace doesn't have a tab,
+                # this can happen if it was never opened in a tab or its tab was closed independently.
+                # For now, do nothing if tab doesn't exist.
+                if new_active_tab_id is not None:
                     try:
-                        # Check if pane exists before trying to activate
-                        if editor_tabs.get_pane_by_id(new_active_tab_id):
-                             editor_tabs.active = new_active_tab_id
-                             # Focus editor in the new active tab
-                             newly_active_pane = editor_tabs.get_pane(new_active_tab_id)
-                             newly_active_pane.query_one(EditorWidget).focus()
-                        # else:
-                            # The new active file from workspace doesn't have a tab,
-                            # this can happen if it was never opened in a tab or its tab was closed independently.
-                            # Optionally open it, or let it be without a tab for now.
-                            # For now, do nothing if tab doesn't exist.
-                    except Exception: # Catch if get_pane_by_id or query fails
+                        editor_tabs.active = new_active_tab_id
+                        # Focus editor in the new active tab
+                        editor_tabs.get_pane(new_active_tab_id).query_one(EditorWidget).focus()
+                    except NoMatches: # Pane or editor missing
                         pass # Silently fail to switch tab if it's problematic
 
-            # If no tabs left, or last tab was closed and no new active file, show welcome
-            if editor_tabs.tab_count == 0 and not editor_tabs.query("#welcome_tab"):
-                await editor_tabs.add_pane(TabPane("Welcome", WelcomeWidget(), id="welcome_tab"))
+            # If only the hidden welcome tab is left, show it again
+            if editor_tabs.tab_count == 1 and self._welcome_pane.is_mounted:
+                editor_tabs.show_tab("welcome_tab")
                 editor_tabs.active = "welcome_tab"
 
-        except Exception as e: # Catch errors like pane not found or widget missing
-            self.notify(f"Error closing tab: {e}", severity="error")
+    def _lsp_started_client(self, file_path: Path) -> Optional[LSPClient]:
+        """The running client for the file's language, without starting one."""
+        language_id = self._lsp_language_id(file_path)
+        return self.lsp_registry.get_client(language_id) if language_id is not None else None
+
+    async def action_hover(self) -> None:
+        editor_tabs = self.query_one(TabbedContent)
+        active_tab_id = editor_tabs.active
+        if not active_tab_id or active_tab_id == "welcome_tab":
+            return
+        try:
+            editor_widget = editor_tabs.get_pane(active_tab_id).query_one(EditorWidget)
+        except NoMatches:
+            return
+        if editor_widget.file_path is None or editor_widget.text_area is None:
+            return
+
+        line, character = editor_widget.text_area.cursor_location
+        results = await self.lsp_registry.hover_all(editor_widget.file_path, line, character)
+        texts = [text for text in map(_hover_text, results) if text] # Skips None and exceptions
+        if texts:
+            self.notify(escape("\n\n".join(texts)), title="Hover")
+        else:
+            self.notify("No hover information.", severity="information")
+
+    async def on_unmount(self) -> None:
+        # Servers still starting are registered once started, so they are shut down below too
+        await asyncio.gather(*self._lsp_starts.values(), return_exceptions=True)
+        await self.lsp_registry.shutdown_all() # Stop all language servers in parallel
+
+    def action_refresh_explorer(self) -> None:
+        try:
+            explorer = self.query_one(FileExplorerWidget)
+        except NoMatches:
+            return
+        explorer.request_reload() # Debounced, so holding the key rescans once
 
     # Placeholder for command palette
     async def action_command_palette(self) -> None:
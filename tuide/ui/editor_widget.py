@@ -1,13 +1,169 @@
+import asyncio
+import codecs
+import itertools
+import mmap
+import os
+import stat
+import tempfile
 from pathlib import Path
-from typing import Optional
+from types import MappingProxyType
+from typing import List, Mapping, Optional
 
+from textual.message import Message
 from textual.widget import Widget
 from textual.widgets import TextArea
+
+from tuide.core.workspace import Workspace
 # Binding is not used in the provided code, but might be useful later
 # from textual.binding import Binding
 
+# Numbers the editors' tab ids. Paths can't be used in ids (Textual allows only letters,
+# digits, '_' and '-'), and the numbers are never reused.
+_tab_numbers = itertools.count(1)
+
+# File suffix -> TextArea language, for editors opened without an explicit language
+_LANG_MAP: Mapping[str, str] = MappingProxyType({
+    ".py": "python", ".md": "markdown", ".json": "json", ".js": "javascript", ".html": "html", ".css": "css",
+})
+
+def _infer_language(path: Path) -> Optional[str]:
+    # Basic inference, can be improved
+    return _LANG_MAP.get(path.suffix.lower())
+
+def _decode_chunks(data: bytes, chunk_size: int) -> List[str]:
+    """
+    Decodes UTF-8 bytes into pieces of at most chunk_size bytes' worth of text, with
+    newlines translated like read_text(). Undecodable bytes become U+FFFD.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    chunks = []
+    carry = ""
+    with memoryview(data) as view: # Released on exit, so a memory map can be closed right after
+        for start in range(0, len(view), chunk_size):
+            text = carry + decoder.decode(view[start:start + chunk_size])
+            carry = ""
+            if text.endswith("\r"): # Could be the first half of a \r\n split across two chunks
+                text, carry = text[:-1], "\r"
+            if "\r" in text:
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+            if text:
+                chunks.append(text)
+    tail = (carry + decoder.decode(b"", final=True)).replace("\r", "\n")
+    if tail:
+        chunks.append(tail)
+    return chunks
+
+def _read_chunks(path: Path, chunk_size: int, mmap_threshold: int) -> List[str]:
+    """
+    Reads and decodes a file with _decode_chunks. Files of at least mmap_threshold bytes are
+    decoded straight from a read-only memory map, so no bytes copy of the whole file is made.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < mmap_threshold:
+            return _decode_chunks(f.read(), chunk_size)
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError): # Not mappable (e.g. a special file): plain read
+            return _decode_chunks(f.read(), chunk_size)
+        with mm:
+            return _decode_chunks(mm, chunk_size)
+
+def _write_in_place(target: str, data: bytes) -> None:
+    """Truncates and rewrites target itself, keeping its inode, links, owner and attributes."""
+    with open(target, "wb") as f: # A new file is created with 0o666 minus the umask
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+def _copy_metadata(st: os.stat_result, source: str, fd: int) -> None:
+    """Gives the file open as fd the mode, owner and extended attributes (incl. ACLs) of source."""
+    os.fchmod(fd, stat.S_IMODE(st.st_mode)) # mkstemp creates the file 0o600
+    if hasattr(os, "fchown") and (st.st_uid, st.st_gid) != (os.getuid(), os.getgid()):
+        os.fchown(fd, st.st_uid, st.st_gid)
+    if hasattr(os, "listxattr"):
+        for attribute in os.listxattr(source):
+            os.setxattr(fd, attribute, os.getxattr(source, attribute))
+
+def _fsync_directory(directory: str) -> None:
+    """Makes a rename in directory durable. Not every platform or filesystem supports it."""
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """
+    Writes data to path through a uniquely named temporary file in the same directory,
+    fsync()s it and os.replace()s the target, so a failed save or a crash never leaves a
+    truncated file behind. Symlinks are followed; mode, owner and extended attributes are kept.
+
+    Falls back to rewriting the file in place where a replacement would change more than its
+    content: for new files, hard-linked files, files whose owner or attributes can't be
+    carried over, and writable files in a directory that isn't.
+    """
+    target = os.path.realpath(path)
+    directory, name = os.path.split(target)
+    try:
+        st = os.stat(target)
+    except FileNotFoundError:
+        st = None
+    if st is None or st.st_nlink > 1: # New file, or replacing it would split its hard links
+        _write_in_place(target, data)
+        return
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    except PermissionError: # No temporary files here, but the file itself may be writable
+        _write_in_place(target, data)
+        return
+    try:
+        with open(fd, "wb") as f:
+            try:
+                _copy_metadata(st, target, f.fileno())
+            except OSError: # e.g. a file owned by another user: keep the original inode instead
+                replace = False
+            else:
+                replace = True
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        if replace:
+            os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    if not replace:
+        os.unlink(tmp_path)
+        _write_in_place(target, data)
+        return
+    _fsync_directory(directory)
+
 
 class EditorWidget(Widget):
+    class Loaded(Message):
+        """Posted when load_file has put the whole file into the TextArea."""
+        def __init__(self, editor: "EditorWidget") -> None:
+            super().__init__()
+            self.editor = editor
+
+    class Changed(Message):
+        """Posted when the text of an editor with a file path was edited."""
+        def __init__(self, editor: "EditorWidget") -> None:
+            super().__init__()
+            self.editor = editor
+
+    LOAD_CHUNK_SIZE = 64 * 1024  # Bytes of a file inserted into the TextArea per event loop turn
+    MMAP_THRESHOLD = 1024 * 1024  # Files at least this large are decoded from a memory map
+    CACHE_MAX_BYTES = 4 * 1024 * 1024  # Larger files aren't memoized: that needs a second full copy of the text
+
     DEFAULT_CSS = """
     EditorWidget {
         height: 100%;
@@ -24,30 +180,37 @@ class EditorWidget(Widget):
         name: Optional[str] = None,
         id: Optional[str] = None,
         classes: Optional[str] = None,
+        workspace: Optional[Workspace] = None,
     ):
         super().__init__(name=name, id=id, classes=classes)
         self.file_path = file_path
+        self.workspace = workspace # Optional: shares recently read file contents across tabs
         self.language = language # Store for future use (e.g. LSP, TreeSitter)
+        self.is_loading = False # True while load_file is still streaming text into the TextArea
+        self.tab_id = f"tab_{next(_tab_numbers)}" # Id for the TabPane holding this editor, computed once
 
-        # Initialize TextArea with some default options
-        # The language parameter in TextArea is for syntax highlighting if supported by its theme
-        # However, as of Textual 0.47, language parameter in TextArea constructor is for lexer name for pygments.
-        # If a specific lexer isn't needed at init, it can be omitted or set to None.
         ta_name = f"text_area_{file_path.name if file_path else 'untitled'}"
         if name is not None: # If a name is provided for EditorWidget, use it for TextArea too for simplicity
              ta_name = name
+        self._text_area_name = ta_name
+        # The TextArea is only built on mount, so tabs that are created but never shown cost little
+        self.text_area: Optional[TextArea] = None
+        self._initial_text = "" # Text set through the text property before mount
 
+    async def on_mount(self) -> None: # Added type hint for consistency
+        # Initialize TextArea with some default options
+        # The language parameter in TextArea is for syntax highlighting if supported by its theme
+        # However, as of Textual 0.47, language parameter in TextArea constructor is for lexer name for pygments.
+        # If a specific lexer isn't needed at init, it can be omitted or set to None.
         self.text_area = TextArea(
-            "", # Initial content
-            language=language, # Pass language if provided, else None. Pygments will try to guess if None.
+            self._initial_text, # Initial content
+            language=self.language, # Pass language if provided, else None. Pygments will try to guess if None.
             show_line_numbers=True,
-            name=ta_name
+            name=self._text_area_name
         )
+        self._initial_text = ""
+        await self.mount(self.text_area)
 
-    def compose(self):
-        yield self.text_area
-
-    async def on_mount(self) -> None: # Added type hint for consistency
         if self.file_path and self.file_path.exists():
             await self.load_file(self.file_path)
         else:
@@ -59,28 +222,54 @@ class EditorWidget(Widget):
 
     async def load_file(self, file_path: Path) -> None:
         self.file_path = file_path
+        if self.text_area is None: # Not mounted yet; on_mount loads file_path
+            if self._text_area_name.startswith("text_area_"):
+                self._text_area_name = f"text_area_{file_path.name}"
+            return
         # Update language if it's None or we want to infer from new file_path
-        if self.language is None and file_path.suffix:
-            # Basic inference, can be improved
-            lang_map = {".py": "python", ".md": "markdown", ".json": "json", ".js": "javascript", ".html": "html", ".css": "css"}
-            self.language = lang_map.get(file_path.suffix.lower())
-            if self.text_area.language != self.language : # Check if TextArea has language attribute to set
-                 try:
-                    self.text_area.language = self.language
-                 except AttributeError: # Should not happen with recent Textual versions
-                    pass
+        # (applied to the TextArea once the text is loaded)
+        if self.language is None:
+            self.language = _infer_language(file_path)
 
+        try:
+            # Read and decode off the event loop so a large file doesn't freeze the UI
+            st = await asyncio.to_thread(os.stat, file_path) if self.workspace else None
+            content = self.workspace.get_cached_content(file_path, st) if self.workspace else None
+            if content is not None: # Unchanged since last read, e.g. a reopened tab
+                chunks = [content[i:i + self.LOAD_CHUNK_SIZE] for i in range(0, len(content), self.LOAD_CHUNK_SIZE)]
+            else:
+                chunks = await asyncio.to_thread(_read_chunks, file_path, self.LOAD_CHUNK_SIZE, self.MMAP_THRESHOLD)
+                if self.workspace and st.st_size <= self.CACHE_MAX_BYTES:
+                    content = chunks[0] if len(chunks) == 1 else "".join(chunks) # A single chunk is shared, not copied
+                    self.workspace.cache_content(file_path, st, content)
+        except OSError as e:
+            self.app.notify(f"Error loading file {file_path}: {e}", severity="error")
+            return
 
+        self.is_loading = True
+        previous_language = self.text_area.language
+        self.text_area.language = None # Highlight once, on the complete text, rather than per chunk
         try:
-            content = file_path.read_text(encoding='utf-8') # Specify encoding
-            self.text_area.load_text(content) # load_text is synchronous
-            # Update the name of the TextArea to reflect the file, if not explicitly named.
-            if self.text_area.name is None or self.text_area.name.startswith("text_area_"):
-                 self.text_area.name = f"text_area_{file_path.name}"
-        except Exception as e:
-            # Log error or show notification to user
-            # For now, print to console. In a real app, use app.notify or a status bar.
-            print(f"Error loading file {file_path}: {e}")
+            self.text_area.load_text(chunks[0] if chunks else "") # load_text is synchronous
+            for chunk in chunks[1:]:
+                await asyncio.sleep(0) # Let the app render and handle input between chunks
+                self.text_area.insert(chunk, self.text_area.document.end)
+        finally:
+            self.is_loading = False
+            self.text_area.language = self.language or previous_language
+        try:
+            self.text_area.history.clear() # The streamed inserts shouldn't be undoable
+        except AttributeError: # TextArea without undo history (older Textual)
+            pass
+        # Update the name of the TextArea to reflect the file, if not explicitly named.
+        if self.text_area.name is None or self.text_area.name.startswith("text_area_"):
+             self.text_area.name = f"text_area_{file_path.name}"
+        self.post_message(self.Loaded(self))
+
+    def on_text_area_changed(self, event: TextArea.Changed) -> None:
+        event.stop()
+        if self.file_path is not None:
+            self.post_message(self.Changed(self))
 
     async def save_file(self, file_path: Optional[Path] = None) -> bool:
         target_path = file_path or self.file_path
@@ -89,37 +278,45 @@ class EditorWidget(Widget):
             # For now, print to console. In a real app, use app.notify or a status bar.
             print("Error: No file path specified for saving.")
             return False
+        if self.is_loading or self.text_area is None:
+            # Saving now would write a partially loaded (or not yet loaded) file over the original
+            return False
 
         try:
-            content = self.text_area.text
-            target_path.write_text(content, encoding='utf-8') # Specify encoding
+            # Encoded once and written as bytes off the event loop; no text-mode newline translation
+            data = self.text_area.text.encode('utf-8')
+            await asyncio.to_thread(_write_atomic, target_path, data)
+            if self.workspace:
+                self.workspace.invalidate_content(target_path)
             self.file_path = target_path # Update file_path if saved to a new location
             # Update language if it was inferred and path changed
-            if target_path.suffix and self.language is None: # or some other logic to re-infer
-                lang_map = {".py": "python", ".md": "markdown", ".json": "json", ".js": "javascript", ".html": "html", ".css": "css"}
-                new_language = lang_map.get(target_path.suffix.lower())
+            if self.language is None: # or some other logic to re-infer
+                new_language = _infer_language(target_path)
                 if new_language and self.text_area.language != new_language:
                     self.language = new_language
-                    try:
-                        self.text_area.language = new_language
-                    except AttributeError:
-                        pass
+                    self.text_area.language = new_language
             return True
-        except Exception as e:
-            print(f"Error saving file {target_path}: {e}")
+        except OSError as e:
+            self.app.notify(f"Error saving file {target_path}: {e}", severity="error")
             return False
 
     @property
     def text(self) -> str:
+        if self.text_area is None:
+            return self._initial_text
         return self.text_area.text
 
     @text.setter
     def text(self, new_text: str) -> None:
+        if self.text_area is None:
+            self._initial_text = new_text
+            return
         self.text_area.load_text(new_text) # load_text is synchronous
 
     # Delegate focus to the TextArea
     def focus(self, scroll_visible: bool = True) -> None: # Return type is None for focus method
-        self.text_area.focus(scroll_visible)
+        if self.text_area is not None: # Before mount, on_mount focuses it once built
+            self.text_area.focus(scroll_visible)
 
 # Example usage (for testing within this file, if needed)
 if __name__ == '__main__':
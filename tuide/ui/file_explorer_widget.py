@@ -1,16 +1,36 @@
+import fnmatch
+import re
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional, Tuple
 
+from textual.timer import Timer
 from textual.widgets import DirectoryTree
 # from textual.app import ComposeResult # Not strictly needed for the widget itself
 # from textual.message import Message # Not used as we are propagating DirectoryTree's message
 
+# Glob patterns (matched against names) for entries that are rarely browsed but can be huge to
+# list. ".*" covers dotfiles, including .git and .venv.
+_DEFAULT_IGNORE: Tuple[str, ...] = (".*", "node_modules", "__pycache__", "venv", "*.pyc")
+# Names listed even if an ignore pattern matches them: .tuide holds the project config and macros
+_DEFAULT_SHOW: Tuple[str, ...] = (".tuide",)
+
+def _compile_filter(ignore_patterns: Iterable[str], show_patterns: Iterable[str]) -> "re.Pattern[str]":
+    """One regex matching the names to leave out: any ignore pattern, unless a show pattern matches."""
+    ignore = "|".join(fnmatch.translate(pattern) for pattern in ignore_patterns)
+    if not ignore:
+        return re.compile("(?!)") # Never matches
+    show = "|".join(fnmatch.translate(pattern) for pattern in show_patterns)
+    return re.compile(f"(?!{show})(?:{ignore})" if show else ignore)
+
 class FileExplorerWidget(DirectoryTree):
     """
     A file explorer widget based on Textual's DirectoryTree.
     It displays the file system tree starting from a given path.
     When a file is selected, it emits the standard DirectoryTree.FileSelected message.
+    Entries whose name matches one of the ignore_patterns globs are not listed,
+    unless it also matches one of the show_patterns globs.
     """
+    RELOAD_DEBOUNCE_SECONDS = 0.25  # Reload requests within this window are coalesced into one
 
     def __init__(
         self,
@@ -18,6 +38,8 @@ class FileExplorerWidget(DirectoryTree):
         name: Optional[str] = None,
         id: Optional[str] = None,
         classes: Optional[str] = None,
+        ignore_patterns: Iterable[str] = _DEFAULT_IGNORE,
+        show_patterns: Iterable[str] = _DEFAULT_SHOW,
         # Add any other DirectoryTree parameters you might want to expose here
     ):
         """
@@ -28,9 +50,31 @@ class FileExplorerWidget(DirectoryTree):
             name: The name of the widget.
             id: The ID of the widget.
             classes: CSS classes for the widget.
+            ignore_patterns: Glob patterns (e.g. "*.pyc") for names to leave out of the tree.
+            show_patterns: Glob patterns for names to list even if an ignore pattern matches.
         """
         # The 'path' argument for DirectoryTree's constructor must be a string.
         super().__init__(path=str(path), name=name, id=id, classes=classes)
+        # All patterns compiled into one regex: one C-level match per directory entry
+        self._ignore_re = _compile_filter(ignore_patterns, show_patterns)
+        self._reload_timer: Optional[Timer] = None
+
+    def filter_paths(self, paths: Iterable[Path]) -> Iterable[Path]:
+        ignore_match = self._ignore_re.match
+        return [path for path in paths if not ignore_match(path.name)]
+
+    def request_reload(self) -> None:
+        """
+        Reloads the tree once no further request has arrived for RELOAD_DEBOUNCE_SECONDS,
+        so a burst of changes (e.g. a checkout touching many files) costs a single rescan.
+        """
+        if self._reload_timer is not None:
+            self._reload_timer.stop()
+        self._reload_timer = self.set_timer(self.RELOAD_DEBOUNCE_SECONDS, self._do_reload)
+
+    def _do_reload(self) -> None:
+        self._reload_timer = None
+        self.reload()
 
     # The DirectoryTree widget itself handles file/directory selection (mouse clicks, Enter key)
     # and emits a `DirectoryTree.FileSelected` message when a file is selected,
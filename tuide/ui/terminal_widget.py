@@ -1,12 +1,18 @@
 import asyncio
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Set
 
+from rich.markup import escape
 from textual.widget import Widget
 from textual.widgets import RichLog
 # from textual.binding import Binding # Not used in this version
 
 class TerminalWidget(Widget):
+    QUEUE_SIZE = 256  # Max blocks of command output waiting to be written to the RichLog
+    FLUSH_MS = 50  # Min time between two RichLog writes of command output
+    READ_SIZE = 64 * 1024  # Bytes requested per read from the command's stdout/stderr
+    MAX_LINE_BYTES = 64 * 1024  # A longer unterminated line is written in pieces of this size
+
     DEFAULT_CSS = """
     TerminalWidget {
         height: 100%;
@@ -26,6 +32,10 @@ class TerminalWidget(Widget):
     ):
         super().__init__(name=name, id=id, classes=classes)
         self.rich_log = RichLog(highlight=True, markup=True, wrap=False, auto_scroll=True)
+        # Running commands and the tasks reading their output, stopped if the widget is unmounted.
+        # Each run_command adds and removes only its own, so concurrent commands don't clash.
+        self._processes: Set[asyncio.subprocess.Process] = set()
+        self._reader_tasks: Set[asyncio.Task] = set()
 
     def compose(self):
         yield self.rich_log
@@ -36,10 +46,20 @@ class TerminalWidget(Widget):
     def clear_log(self) -> None:
         self.rich_log.clear()
 
+    def on_unmount(self) -> None:
+        # The writer task then drains what was read and run_command finishes on its own
+        for task in self._reader_tasks:
+            task.cancel()
+        for process in self._processes:
+            if process.returncode is None:
+                process.kill()
+
     async def run_command(self, command: str, cwd: Optional[Path] = None) -> None:
         self.rich_log.write(f"[b]$ {command}[/b]")
 
         cwd_str = str(cwd) if cwd else None
+        process: Optional[asyncio.subprocess.Process] = None
+        readers: List[asyncio.Task] = []
 
         try:
             process = await asyncio.create_subprocess_shell(
@@ -49,23 +69,68 @@ class TerminalWidget(Widget):
                 cwd=cwd_str
             )
 
+            # Readers put the lines of each block they read on a bounded queue and a single writer
+            # drains it into the RichLog, coalescing everything queued into one write (one refresh)
+            # at most every FLUSH_MS. A command that outpaces the UI fills the queue, which stalls
+            # the readers and then the command itself on its full pipe, instead of piling up output.
+            queue: "asyncio.Queue[Optional[List[str]]]" = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+
+            def decode_line(line_bytes: bytes, prefix: str) -> str:
+                try:
+                    line = line_bytes.decode('utf-8', errors='replace').rstrip() # Added errors='replace'
+                    # Escaped: output is plain text, and in a batch a stray tag would leak into other lines
+                    return f"{prefix}{escape(line)}"
+                except UnicodeDecodeError: # Should be less likely with errors='replace'
+                    return f"{prefix}[dim](undecodable bytes)[/dim]"
+
             async def stream_output(stream: Optional[asyncio.StreamReader], prefix=""): # Added type hint
                 if stream is None:
                     return
-                while True:
-                    line_bytes = await stream.readline()
-                    if not line_bytes:
+                # Read in large blocks and split lines here: far fewer awaits than readline() per line
+                partial = bytearray() # Start of a line whose newline hasn't arrived yet
+                while chunk := await stream.read(self.READ_SIZE):
+                    end = chunk.rfind(b"\n")
+                    if end < 0:
+                        partial += chunk
+                        if len(partial) > self.MAX_LINE_BYTES: # e.g. binary output or a "\r" progress bar
+                            await queue.put([
+                                decode_line(partial[i:i + self.MAX_LINE_BYTES], prefix)
+                                for i in range(0, len(partial), self.MAX_LINE_BYTES)
+                            ])
+                            partial = bytearray()
+                        continue
+                    partial += chunk[:end]
+                    await queue.put([decode_line(line_bytes, prefix) for line_bytes in partial.split(b"\n")])
+                    partial = bytearray(chunk[end + 1:])
+                if partial: # Last line without a trailing newline
+                    await queue.put([decode_line(partial, prefix)])
+
+            async def write_output() -> None:
+                finished = False
+                while not finished:
+                    lines = await queue.get()
+                    if lines is None:
                         break
-                    try:
-                        line = line_bytes.decode('utf-8', errors='replace').rstrip() # Added errors='replace'
-                        self.rich_log.write(f"{prefix}{line}")
-                    except UnicodeDecodeError: # Should be less likely with errors='replace'
-                        self.rich_log.write(f"{prefix}[dim](undecodable bytes)[/dim]")
-
-            await asyncio.gather(
-                stream_output(process.stdout, ""),
-                stream_output(process.stderr, "[red]ERR: [/red]")
-            )
+                    while not queue.empty():
+                        more = queue.get_nowait()
+                        if more is None:
+                            finished = True
+                            break
+                        lines += more
+                    self.rich_log.write("\n".join(lines))
+                    if not finished:
+                        await asyncio.sleep(self.FLUSH_MS / 1000)
+
+            self._processes.add(process)
+            async with asyncio.TaskGroup() as task_group:
+                task_group.create_task(write_output())
+                readers = [
+                    task_group.create_task(stream_output(process.stdout, "")),
+                    task_group.create_task(stream_output(process.stderr, "[red]ERR: [/red]")),
+                ]
+                self._reader_tasks.update(readers)
+                await asyncio.wait(readers)
+                await queue.put(None) # Both streams are done (or cancelled by on_unmount)
 
             # Ensure the process has actually finished and streams are drained.
             await process.wait()
@@ -79,6 +144,9 @@ class TerminalWidget(Widget):
             self.rich_log.write(f"[red]Error: Command not found: {command.split()[0]}[/red]")
         except Exception as e:
             self.rich_log.write(f"[red]Error running command '{command}': {e}[/red]")
+        finally:
+            self._processes.discard(process)
+            self._reader_tasks.difference_update(readers)
 
         self.rich_log.write("") # Add a blank line for separation
 